@@ -0,0 +1,10 @@
+"""
+Benchmarks for ComfyUI-Eagle-Send.
+
+Run from the repository root without ComfyUI or Eagle:
+
+    python -m benchmarks.run --out bench.json
+
+A stub `folder_paths` module and a local stand-in for Eagle's HTTP API are
+provided by this package, so results are comparable between releases.
+"""
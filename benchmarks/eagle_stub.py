@@ -0,0 +1,175 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from typing import Any, Dict, List, Optional
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "EagleStub"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _reply(self, code: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        # Single write: headers and body in one segment (no Nagle/delayed ACK stall)
+        head = (
+            f"HTTP/1.1 {code} {self.responses.get(code, ('',))[0]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1")
+        self.wfile.write(head + body)
+
+    def do_GET(self) -> None:
+        self.server.record("GET " + self.path, 0)
+        if self.path.startswith("/api/application/info"):
+            self._reply(200, {"status": "success", "data": {"version": "stub"}})
+        elif self.path.startswith("/api/item/list"):
+            query = parse_qs(urlsplit(self.path).query)
+            keyword = (query.get("keyword") or [""])[0]
+            self._reply(200, {"status": "success", "data": self.server.list_items(keyword)})
+        elif self.path.startswith("/api/item/info"):
+            item_id = (parse_qs(urlsplit(self.path).query).get("id") or [""])[0]
+            item = self.server.get_item(item_id)
+            if item is None:
+                self._reply(400, {"status": "error", "message": "unknown item"})
+            else:
+                self._reply(200, {"status": "success", "data": item})
+        elif self.path.startswith("/api/folder/list"):
+            self._reply(200, {"status": "success", "data": self.server.folder_tree()})
+        else:
+            self._reply(404, {"status": "error"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        try:
+            payload = json.loads(raw or b"{}")
+        except Exception:
+            self._reply(400, {"status": "error", "message": "invalid json"})
+            return
+        items = payload.get("items") if isinstance(payload, dict) else None
+        count = len(items) if isinstance(items, list) else 0
+        self.server.record("POST " + self.path, count)
+        if self.path in ("/api/item/addFromPaths", "/api/item/addFromURLs"):
+            self.server.add_items(items if isinstance(items, list) else [], payload.get("folderId"))
+            self._reply(200, {"status": "success"})
+        elif self.path == "/api/item/update":
+            item = self.server.update_item(str(payload.get("id") or ""), payload.get("tags"))
+            if item is None:
+                self._reply(400, {"status": "error", "message": "unknown item"})
+            else:
+                self._reply(200, {"status": "success", "data": item})
+        elif self.path == "/api/folder/create":
+            folder = self.server.create_folder(str(payload.get("folderName") or ""), payload.get("parent"))
+            if folder is None:
+                self._reply(400, {"status": "error", "message": "unknown parent"})
+            else:
+                self._reply(200, {"status": "success", "data": folder})
+        else:
+            self._reply(404, {"status": "error"})
+
+
+class EagleStub(ThreadingHTTPServer):
+    """Local stand-in for the parts of Eagle's HTTP API used by the node.
+
+    Counts requests and items per endpoint; start() serves from a daemon thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.items: Dict[str, int] = {}
+        self.folders: List[Dict[str, Any]] = []
+        # Imported items (id, name, tags) for item/list and item/update
+        self.library: List[Dict[str, Any]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, endpoint: str, items: int) -> None:
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.items[endpoint] = self.items.get(endpoint, 0) + items
+
+    def add_items(self, items: List[Dict[str, Any]], folder_id: Optional[str] = None) -> None:
+        with self._lock:
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                name = item.get("name") or os.path.splitext(os.path.basename(str(item.get("path") or "")))[0]
+                self.library.append({
+                    "id": uuid.uuid4().hex[:13].upper(),
+                    "name": name,
+                    "tags": list(item.get("tags") or []),
+                    "folders": [folder_id] if folder_id else [],
+                })
+
+    def list_items(self, keyword: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(i, tags=list(i["tags"])) for i in self.library if keyword in i["name"]]
+
+    def get_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for item in self.library:
+                if item["id"] == item_id:
+                    return dict(item, tags=list(item["tags"]))
+        return None
+
+    def update_item(self, item_id: str, tags: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for item in self.library:
+                if item["id"] == item_id:
+                    if isinstance(tags, list):
+                        item["tags"] = [str(t) for t in tags]
+                    return dict(item, tags=list(item["tags"]))
+        return None
+
+    def folder_tree(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return json.loads(json.dumps(self.folders))
+
+    def _find_folder(self, nodes: List[Dict[str, Any]], folder_id: str) -> Optional[Dict[str, Any]]:
+        for node in nodes:
+            if node["id"] == folder_id:
+                return node
+            found = self._find_folder(node["children"], folder_id)
+            if found is not None:
+                return found
+        return None
+
+    def create_folder(self, name: str, parent: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            siblings = self.folders
+            if parent:
+                node = self._find_folder(self.folders, parent)
+                if node is None:
+                    return None
+                siblings = node["children"]
+            folder = {"id": uuid.uuid4().hex[:13].upper(), "name": name, "children": []}
+            siblings.append(folder)
+            return {"id": folder["id"], "name": name}
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.items.clear()
+
+    def start(self) -> "EagleStub":
+        self._thread = threading.Thread(target=self.serve_forever, name="EagleStub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import json
+import os
+import re
+import struct
+import sys
+import types
+from typing import Dict, List, Optional
+
+# Folder types the node resolves through folder_paths
+MODEL_FOLDERS = ("checkpoints", "diffusion_models", "loras", "clip", "vae")
+
+
+def install_folder_paths(root: str) -> types.ModuleType:
+    """Install a minimal stand-in for ComfyUI's `folder_paths` module.
+
+    Model folders live under `<root>/models/<folder>` and images are written to
+    `<root>/output`. Must be called before importing comfyui_eagle_send.
+    """
+    models_dir = os.path.join(root, "models")
+    output_dir = os.path.join(root, "output")
+    for folder in MODEL_FOLDERS:
+        os.makedirs(os.path.join(models_dir, folder), exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    mod = types.ModuleType("folder_paths")
+
+    def get_folder_paths(folder_name: str) -> List[str]:
+        return [os.path.join(models_dir, folder_name)]
+
+    def get_filename_list(folder_name: str) -> List[str]:
+        out: List[str] = []
+        for base in get_folder_paths(folder_name):
+            for dirpath, _, files in os.walk(base):
+                for name in files:
+                    out.append(os.path.relpath(os.path.join(dirpath, name), base).replace(os.sep, "/"))
+        return sorted(out)
+
+    def get_full_path(folder_name: str, filename: str) -> Optional[str]:
+        for base in get_folder_paths(folder_name):
+            p = os.path.join(base, filename)
+            if os.path.isfile(p):
+                return p
+        return None
+
+    def get_output_directory() -> str:
+        return output_dir
+
+    def get_save_image_path(filename_prefix: str, out_dir: str, image_width: int = 0, image_height: int = 0):
+        subfolder = os.path.dirname(os.path.normpath(filename_prefix))
+        filename = os.path.basename(os.path.normpath(filename_prefix))
+        full_output_folder = os.path.join(out_dir, subfolder)
+        os.makedirs(full_output_folder, exist_ok=True)
+        pattern = re.compile(re.escape(filename) + r"_(\d+)_")
+        counter = 1
+        for existing in os.listdir(full_output_folder):
+            m = pattern.match(existing)
+            if m:
+                counter = max(counter, int(m.group(1)) + 1)
+        return full_output_folder, filename, counter, subfolder, filename_prefix
+
+    mod.get_folder_paths = get_folder_paths
+    mod.get_filename_list = get_filename_list
+    mod.get_full_path = get_full_path
+    mod.get_output_directory = get_output_directory
+    mod.get_save_image_path = get_save_image_path
+    mod.models_dir = models_dir
+    sys.modules["folder_paths"] = mod
+    return mod
+
+
+def _safetensors_header(name: str, size: int) -> bytes:
+    # Length prefix + JSON header for one uint8 tensor filling the rest of `size` bytes
+    data = size
+    while True:
+        header = json.dumps({name: {"dtype": "U8", "shape": [data], "data_offsets": [0, data]}}).encode("utf-8")
+        header += b" " * (-len(header) % 8)
+        fitted = max(0, size - 8 - len(header))
+        if fitted == data:
+            return struct.pack("<Q", len(header)) + header
+        data = fitted
+
+
+def write_model_files(root: str, sizes: Dict[str, List[int]]) -> Dict[str, List[str]]:
+    """Create files of the given byte sizes per folder; returns {folder: [basename without ext]}.
+
+    Each file is a valid safetensors file holding one uint8 tensor of random data.
+    """
+    names: Dict[str, List[str]] = {}
+    chunk = os.urandom(1024 * 1024)
+    for folder, folder_sizes in sizes.items():
+        base = os.path.join(root, "models", folder)
+        os.makedirs(base, exist_ok=True)
+        names[folder] = []
+        for i, size in enumerate(folder_sizes):
+            name = f"bench_{folder}_{i}"
+            with open(os.path.join(base, name + ".safetensors"), "wb") as f:
+                header = _safetensors_header(name, size)
+                f.write(header)
+                remaining = max(0, size - len(header))
+                while remaining > 0:
+                    n = min(remaining, len(chunk))
+                    f.write(chunk[:n])
+                    remaining -= n
+            names[folder].append(name)
+    return names
@@ -0,0 +1,105 @@
+"""
+Import-time budget for the node registration.
+
+    python -m benchmarks.import_time [--budget-ms 100] [--repeat 5]
+
+Loads the repository's root __init__.py in a fresh interpreter the way ComfyUI
+loads custom nodes, and fails (exit status 1) when the best of --repeat runs
+exceeds the budget or when the import pulls in a module that should only load
+on first use (torch, PIL, numpy, sqlite3, the HTTP client, folder_paths).
+No stub `folder_paths` is installed, so importing it eagerly is an error too.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+# Modules the registration must not import; they load on the first send
+DEFERRED_MODULES = ("torch", "numpy", "PIL", "sqlite3", "http.client", "aiohttp", "folder_paths")
+
+_CHILD = r"""
+import importlib.util, json, os, sys, time
+root = sys.argv[1]
+deferred = sys.argv[2].split(",")
+t0 = time.perf_counter()
+try:
+    spec = importlib.util.spec_from_file_location(
+        "eagle_send_import_check", os.path.join(root, "__init__.py"), submodule_search_locations=[root]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+except Exception as e:
+    print(json.dumps({"error": f"{type(e).__name__}: {e}"}))
+    sys.exit(0)
+elapsed = time.perf_counter() - t0
+print(json.dumps({
+    "seconds": elapsed,
+    "nodes": sorted(module.NODE_CLASS_MAPPINGS),
+    "loaded": [m for m in deferred if m in sys.modules],
+}))
+"""
+
+
+def _repo_root() -> str:
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once(root: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    # Prewarming deliberately imports the hash cache at startup
+    env.pop("EAGLE_HASH_PREWARM", None)
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, root, ",".join(DEFERRED_MODULES)],
+        capture_output=True, text=True, env=env, cwd=root,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"error": (proc.stderr.strip() or f"exit status {proc.returncode}")[-2000:]}
+    return json.loads(lines[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--budget-ms", type=float, default=float(os.environ.get("EAGLE_IMPORT_BUDGET_MS", "100")),
+        help="maximum import time in milliseconds (default 100, or EAGLE_IMPORT_BUDGET_MS)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to try; the best run counts")
+    args = parser.parse_args(argv)
+
+    root = _repo_root()
+    runs = [measure_once(root) for _ in range(max(1, args.repeat))]
+    errors = [r["error"] for r in runs if "error" in r]
+    timings = [r["seconds"] for r in runs if "seconds" in r]
+    loaded = sorted({m for r in runs for m in r.get("loaded", [])})
+    best_ms = min(timings) * 1000.0 if timings else None
+
+    problems: List[str] = []
+    if errors:
+        problems.append(f"import failed: {errors[0]}")
+    if loaded:
+        problems.append("loaded at import: " + ", ".join(loaded))
+    if best_ms is not None and best_ms > args.budget_ms:
+        problems.append(f"{best_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    report = {
+        "budget_ms": args.budget_ms,
+        "best_ms": round(best_ms, 3) if best_ms is not None else None,
+        "runs_ms": [round(t * 1000.0, 3) for t in timings],
+        "nodes": next((r["nodes"] for r in runs if "nodes" in r), []),
+        "loaded": loaded,
+        "ok": not problems,
+        "problems": problems,
+    }
+    print(json.dumps(report, indent=2, sort_keys=True))
+    for problem in problems:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    return 0 if not problems else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+End-to-end benchmark for the Eagle Send node.
+
+    python -m benchmarks.run [--quick] [--out results.json]
+
+Every stage runs against synthetic inputs: a temporary model/output tree behind
+a stub `folder_paths`, and a local HTTP server standing in for Eagle. Results
+are printed (and optionally written) as JSON so runs can be diffed.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .eagle_stub import EagleStub
+from .fake_comfy import install_folder_paths, write_model_files
+from .synthetic import make_images, make_prompt, make_workflow
+
+
+def _measure(fn: Callable[[], Any], iterations: int, warmup: int = 1, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    samples: List[float] = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {
+        "iterations": iterations,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "max_s": max(samples),
+    }
+
+
+def _has_torch() -> bool:
+    try:
+        import torch  # type: ignore  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+class Bench:
+    def __init__(self, root: str, quick: bool):
+        self.root = root
+        self.quick = quick
+        self.iterations = 3 if quick else 10
+        self.results: Dict[str, Any] = {}
+        self.skipped: Dict[str, str] = {}
+
+    def record(self, name: str, result: Dict[str, Any], **extra: Any) -> None:
+        result.update(extra)
+        self.results[name] = result
+        print(f"  {name:<32} median {result['median_s'] * 1000:9.2f} ms", file=sys.stderr)
+
+    def skip(self, name: str, reason: str) -> None:
+        self.skipped[name] = reason
+        print(f"  {name:<32} skipped ({reason})", file=sys.stderr)
+
+
+def bench_hashing(b: Bench, model_paths: List[str]) -> None:
+    from comfyui_eagle_send.hash.compute import calculate_sha256_many
+
+    total = sum(os.path.getsize(p) for p in model_paths)
+
+    def _invalidate() -> None:
+        # A new mtime makes every cached entry stale
+        now = time.time_ns()
+        for i, p in enumerate(model_paths):
+            os.utime(p, ns=(now + i, now + i))
+
+    b.record(
+        "hash.cold", _measure(lambda: calculate_sha256_many(model_paths), b.iterations, setup=_invalidate),
+        files=len(model_paths), bytes=total,
+    )
+    b.record("hash.warm", _measure(lambda: calculate_sha256_many(model_paths), b.iterations * 10), files=len(model_paths))
+
+    # Quick identities (EAGLE_HASH_MODE); timed on the readers so no cache is involved
+    from comfyui_eagle_send.hash.quick import autov1, fingerprint
+
+    for name, fn in (("autov1", autov1), ("fingerprint", fingerprint)):
+        b.record(f"hash.quick_{name}", _measure(lambda fn=fn: [fn(p) for p in model_paths], b.iterations * 10),
+                 files=len(model_paths))
+
+
+def bench_tensor(b: Bench, images) -> None:
+    from comfyui_eagle_send.image.tensor_convert import tensor_to_pil_list
+
+    b.record("tensor.to_pil", _measure(lambda: tensor_to_pil_list(images), b.iterations), frames=int(images.shape[0]))
+
+
+def bench_save(b: Bench, images, workflow: Dict[str, Any]) -> None:
+    from comfyui_eagle_send.image.save import encode_images, plan_memory_output, save_images_output
+    from comfyui_eagle_send.image.tensor_convert import tensor_to_pil_list
+
+    pil_images = tensor_to_pil_list(images)
+    extra = {"workflow": workflow}
+    prompt = make_prompt(40)
+    for fmt in ("png", "webp", "jpeg"):
+        b.record(
+            f"save.{fmt}",
+            _measure(lambda: save_images_output(pil_images, "bench/save", prompt, extra, image_format=fmt), b.iterations),
+            frames=len(pil_images),
+        )
+    os.environ["EAGLE_PNG_COMPRESS_METADATA"] = "1"
+    try:
+        b.record(
+            "save.png_compressed_metadata",
+            _measure(lambda: save_images_output(pil_images, "bench/save", prompt, extra, image_format="png"), b.iterations),
+            frames=len(pil_images),
+        )
+    finally:
+        os.environ.pop("EAGLE_PNG_COMPRESS_METADATA", None)
+    _, kwargs, _ = plan_memory_output("bench/mem", len(pil_images), prompt, extra)
+    b.record("encode.png_in_memory", _measure(lambda: encode_images(pil_images, kwargs), b.iterations), frames=len(pil_images))
+
+
+def bench_parsing(b: Bench, workflow: Dict[str, Any]) -> None:
+    from comfyui_eagle_send.parsing import tags as tags_module
+    from comfyui_eagle_send.parsing.tags import prompt_to_tags
+    from comfyui_eagle_send.parsing.workflow import parse_workflow_resources
+    from comfyui_eagle_send.parsing import workflow as workflow_module
+
+    prompt = make_prompt(120)
+    b.record("tags.parse_cold", _measure(lambda: prompt_to_tags(prompt), b.iterations * 10,
+                                         setup=tags_module._TAGS_CACHE.clear), tags=120)
+    b.record("tags.parse_warm", _measure(lambda: prompt_to_tags(prompt), b.iterations * 100), tags=120)
+
+    payload = json.dumps(workflow)
+    b.record("workflow.parse_dict", _measure(lambda: parse_workflow_resources({"workflow": workflow}), b.iterations * 10),
+             nodes=len(workflow["nodes"]))
+    b.record("workflow.parse_str_cold", _measure(lambda: parse_workflow_resources({"workflow": payload}), b.iterations,
+                                                 setup=workflow_module._RESULT_CACHE.clear), bytes=len(payload))
+    b.record("workflow.parse_str_warm", _measure(lambda: parse_workflow_resources({"workflow": payload}), b.iterations * 10),
+             bytes=len(payload))
+
+
+def bench_http(b: Bench, stub: EagleStub, output_path: str) -> None:
+    from comfyui_eagle_send.eagle.api import send_to_eagle, submit_to_eagle
+
+    sends = 20 if b.quick else 100
+    stub.reset_counts()
+
+    def _sequential() -> None:
+        for _ in range(sends):
+            send_to_eagle(stub.url, [output_path], ["bench"])
+
+    def _submitted() -> None:
+        futures = [submit_to_eagle(stub.url, [output_path], ["bench"]) for _ in range(sends)]
+        for fut in futures:
+            fut.result()
+
+    b.record("http.send_sequential", _measure(_sequential, b.iterations), sends=sends)
+    before = dict(stub.requests)
+    b.record("http.submit_concurrent", _measure(_submitted, b.iterations), sends=sends)
+    after = stub.requests.get("POST /api/item/addFromPaths", 0) - before.get("POST /api/item/addFromPaths", 0)
+    b.results["http.submit_concurrent"]["requests_per_iteration"] = after / (b.iterations + 1)
+
+
+def bench_node(b: Bench, images, workflow: Dict[str, Any]) -> None:
+    from comfyui_eagle_send.nodes.eagle_send import EagleSend
+
+    node = EagleSend()
+    extra = {"workflow": workflow}
+    prompt = make_prompt(40)
+    variants = {
+        "node.send": {},
+        "node.send_streaming": {"streaming": True},
+        "node.send_in_memory": {"save_to_disk": False},
+        "node.send_async": {"async_send": True},
+        "node.send_folder": {"folder": "Bench/%date%"},
+    }
+    for name, kwargs in variants.items():
+        def _run(kwargs=kwargs) -> None:
+            out = json.loads(node.send(images, "bench/node", prompt, negative="lowres", extra_pnginfo=extra, **kwargs)[1])
+            if not out.get("success"):
+                raise RuntimeError(f"{name} failed: {out.get('body')}")
+        b.record(name, _measure(_run, b.iterations), frames=int(images.shape[0]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer iterations and smaller inputs")
+    parser.add_argument("--out", default="", help="also write the JSON results to this file")
+    parser.add_argument("--frames", type=int, default=0, help="images per batch (default 4, 2 with --quick)")
+    parser.add_argument("--size", type=int, default=0, help="image edge in pixels (default 1024, 512 with --quick)")
+    args = parser.parse_args(argv)
+
+    frames = args.frames or (2 if args.quick else 4)
+    size = args.size or (512 if args.quick else 1024)
+    model_mb = 16 if args.quick else 128
+
+    with tempfile.TemporaryDirectory(prefix="eagle_bench_") as root:
+        # Everything the package reads at import or first use points into `root`
+        install_folder_paths(root)
+        os.environ["EAGLE_HASH_CACHE_DIR"] = root
+        stub = EagleStub().start()
+        os.environ["EAGLE_API_HOST"] = stub.url
+        try:
+            names = write_model_files(root, {
+                "checkpoints": [model_mb * 1024 * 1024],
+                "loras": [model_mb * 1024 * 1024 // 8] * 3,
+                "vae": [model_mb * 1024 * 1024 // 4],
+            })
+            model_paths = [
+                os.path.join(root, "models", folder, n + ".safetensors")
+                for folder, folder_names in names.items() for n in folder_names
+            ]
+            workflow = make_workflow(50 if args.quick else 400, names["checkpoints"][0], names["loras"])
+
+            b = Bench(root, args.quick)
+            print("hashing", file=sys.stderr)
+            bench_hashing(b, model_paths)
+            print("parsing", file=sys.stderr)
+            bench_parsing(b, workflow)
+            print("http", file=sys.stderr)
+            bench_http(b, stub, model_paths[0])
+            if _has_torch():
+                images = make_images(frames, size, size)
+                print("tensor / save", file=sys.stderr)
+                bench_tensor(b, images)
+                bench_save(b, images, workflow)
+                print("node", file=sys.stderr)
+                bench_node(b, images, workflow)
+            else:
+                for name in ("tensor", "save", "node"):
+                    b.skip(name, "torch not installed")
+
+            report = {
+                "meta": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "quick": args.quick,
+                    "frames": frames,
+                    "size": size,
+                    "model_mb": model_mb,
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                },
+                "results": b.results,
+                "skipped": b.skipped,
+                "eagle_requests": dict(stub.requests),
+            }
+        finally:
+            stub.stop()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+
+
+def make_images(count: int, height: int, width: int, channels: int = 3, seed: int = 0):
+    """Random IMAGE tensor (N, H, W, C) in [0, 1], like ComfyUI passes to output nodes."""
+    import torch  # type: ignore
+
+    gen = torch.Generator().manual_seed(seed)
+    return torch.rand((count, height, width, channels), generator=gen)
+
+
+def make_workflow(node_count: int, checkpoint: str = "", loras: List[str] | None = None) -> Dict[str, Any]:
+    """UI-format workflow with `node_count` filler nodes plus the given loaders."""
+    nodes: List[Dict[str, Any]] = []
+    for i in range(node_count):
+        nodes.append({
+            "id": i,
+            "type": "KSampler",
+            "pos": [i * 10, i * 5],
+            "size": [315, 262],
+            "inputs": [{"name": "model", "type": "MODEL", "link": i}],
+            "outputs": [{"name": "LATENT", "type": "LATENT", "links": [i + 1]}],
+            "widgets_values": [i, "fixed", 20, 7.0, "euler", "normal", 1.0],
+            "properties": {"Node name for S&R": "KSampler"},
+        })
+    if checkpoint:
+        nodes.append({"id": node_count, "type": "CheckpointLoaderSimple", "widgets_values": [checkpoint + ".safetensors"]})
+    for j, name in enumerate(loras or []):
+        nodes.append({
+            "id": node_count + 1 + j,
+            "type": "LoraLoader",
+            "inputs": {"lora_name": name + ".safetensors", "strength_model": 0.8},
+            "widgets_values": [name + ".safetensors", 0.8, 0.8],
+        })
+    links = [[i, i, 0, i + 1, 0, "MODEL"] for i in range(node_count)]
+    return {"last_node_id": len(nodes), "nodes": nodes, "links": links, "version": 0.4}
+
+
+def make_prompt(tag_count: int) -> str:
+    words = ["masterpiece", "1girl", "(smile:1.2)", "red hair", "[blue eyes]", "BREAK", "outdoors", "sky"]
+    return ", ".join(f"{words[i % len(words)]} {i}" for i in range(tag_count))
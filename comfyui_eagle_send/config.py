@@ -5,3 +5,189 @@ def get_eagle_host() -> str:
     host = os.environ.get("EAGLE_API_HOST")
     return host.strip() if isinstance(host, str) and host.strip() else "http://127.0.0.1:41595"
 
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    raw = os.environ.get(name)
+    try:
+        value = int(raw.strip()) if isinstance(raw, str) and raw.strip() else default
+    except Exception:
+        value = default
+    return max(minimum, value)
+
+
+def _env_float(name: str, default: float, minimum: float = 0.0) -> float:
+    raw = os.environ.get(name)
+    try:
+        value = float(raw.strip()) if isinstance(raw, str) and raw.strip() else default
+    except Exception:
+        value = default
+    return max(minimum, value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name)
+    if not isinstance(raw, str) or not raw.strip():
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_connect_timeout() -> float:
+    return _env_float("EAGLE_API_CONNECT_TIMEOUT", 10.0, minimum=0.1)
+
+
+def get_read_timeout() -> float:
+    return _env_float("EAGLE_API_READ_TIMEOUT", 30.0, minimum=0.1)
+
+
+def get_send_workers() -> int:
+    # Background threads used by the async send queue
+    return _env_int("EAGLE_SEND_WORKERS", 2, minimum=1)
+
+
+def get_send_queue_size() -> int:
+    # Maximum number of async jobs pending (queued, in flight or waiting to retry)
+    return _env_int("EAGLE_SEND_QUEUE_SIZE", 256, minimum=1)
+
+
+def get_send_queue_timeout() -> float:
+    # Seconds the node waits for a free queue slot before sending inline
+    return _env_float("EAGLE_SEND_QUEUE_TIMEOUT", 10.0)
+
+
+def get_send_retries() -> int:
+    # Extra attempts after the first failed async send
+    return _env_int("EAGLE_SEND_RETRIES", 3)
+
+
+def get_send_retry_backoff() -> float:
+    # Base delay in seconds; doubled on each retry
+    return _env_float("EAGLE_SEND_RETRY_BACKOFF", 1.0)
+
+
+def get_batch_window() -> float:
+    # Seconds async sends are collected into one addFromPaths request (0 disables)
+    return _env_float("EAGLE_BATCH_WINDOW_MS", 50.0) / 1000.0
+
+
+def get_batch_max_items() -> int:
+    return _env_int("EAGLE_BATCH_MAX_ITEMS", 100, minimum=1)
+
+
+def get_hash_workers() -> int:
+    # Files hashed at the same time on a cold cache
+    return _env_int("EAGLE_HASH_WORKERS", 4, minimum=1)
+
+
+def get_prewarm_enabled() -> bool:
+    # Hash all model folders in the background after startup
+    return _env_bool("EAGLE_HASH_PREWARM", False)
+
+
+def get_prewarm_settle_seconds() -> float:
+    # Files modified more recently than this are assumed to still be copying
+    return _env_float("EAGLE_HASH_PREWARM_SETTLE", 30.0)
+
+
+def get_save_workers() -> int:
+    # Threads encoding frames of one batch at the same time
+    return _env_int("EAGLE_SAVE_WORKERS", min(8, os.cpu_count() or 1), minimum=1)
+
+
+def get_workflow_cache_size() -> int:
+    # Distinct serialized workflows whose parsed resources are kept
+    return _env_int("EAGLE_WORKFLOW_CACHE_SIZE", 32, minimum=1)
+
+
+def get_tag_aliases_path() -> str:
+    # CSV of tag aliases (Danbooru alias export or tag-autocomplete format)
+    return (os.environ.get("EAGLE_TAG_ALIASES") or "").strip()
+
+
+def get_tag_implications_path() -> str:
+    # CSV of antecedent,consequent tag implications
+    return (os.environ.get("EAGLE_TAG_IMPLICATIONS") or "").strip()
+
+
+def get_tag_cache_size() -> int:
+    return _env_int("EAGLE_TAG_CACHE_SIZE", 256, minimum=1)
+
+
+def get_hash_cache_dir() -> str:
+    # Folder holding hash_cache.sqlite3; defaults to the package folder
+    return (os.environ.get("EAGLE_HASH_CACHE_DIR") or "").strip()
+
+
+def get_metrics_file() -> str:
+    # Metrics sink written after each send; empty disables it
+    return (os.environ.get("EAGLE_METRICS_FILE") or "").strip()
+
+
+def get_metrics_format() -> str:
+    # "jsonl" appends one record per send, "prometheus" rewrites a text exposition file
+    fmt = (os.environ.get("EAGLE_METRICS_FORMAT") or "").strip().lower()
+    return "prometheus" if fmt in ("prometheus", "prom") else "jsonl"
+
+
+def get_folder_cache_ttl() -> float:
+    # Seconds the Eagle folder tree is trusted before it is fetched again
+    return _env_float("EAGLE_FOLDER_CACHE_TTL", 300.0)
+
+
+def get_dedupe_max_entries() -> int:
+    # Image digests remembered for duplicate detection (least recently seen evicted)
+    return _env_int("EAGLE_DEDUPE_MAX_ENTRIES", 100000, minimum=1)
+
+
+def get_outbox_enabled() -> bool:
+    # Journal undeliverable sends to disk and replay them when Eagle is back
+    return _env_bool("EAGLE_OUTBOX", True)
+
+
+def get_outbox_retry_interval() -> float:
+    # Seconds between replay attempts while the outbox is not empty
+    return _env_float("EAGLE_OUTBOX_RETRY", 15.0, minimum=1.0)
+
+
+def get_outbox_max_attempts() -> int:
+    # Replays of one entry answered with a 5xx before it is dropped
+    return _env_int("EAGLE_OUTBOX_MAX_ATTEMPTS", 5, minimum=1)
+
+
+def get_breaker_failures() -> int:
+    # Consecutive connection errors/5xx before sends to a host short-circuit
+    return _env_int("EAGLE_BREAKER_FAILURES", 3, minimum=1)
+
+
+def get_breaker_cooldown() -> float:
+    # Seconds a tripped breaker stays open before a trial request is allowed
+    return _env_float("EAGLE_BREAKER_COOLDOWN", 30.0)
+
+
+def get_probe_timeout() -> float:
+    # Connect/read timeout in seconds for the /api/application/info liveness probe
+    return _env_float("EAGLE_PROBE_TIMEOUT", 1.0, minimum=0.05)
+
+
+HASH_MODES = ("full", "autov1", "fingerprint")
+
+
+def get_hash_mode() -> str:
+    # Model identity in the metadata until the full SHA-256 is cached:
+    # "full" waits for it, "autov1"/"fingerprint" use a quick partial read
+    mode = (os.environ.get("EAGLE_HASH_MODE") or "").strip().lower()
+    return mode if mode in HASH_MODES else "full"
+
+
+def get_hash_sidecars_enabled() -> bool:
+    # Take SHA-256 values from .sha256/.civitai.info/.metadata.json files next to models
+    return _env_bool("EAGLE_HASH_SIDECARS", True)
+
+
+def get_hash_write_sidecars() -> bool:
+    # Write <model file>.sha256 after hashing a model
+    return _env_bool("EAGLE_HASH_WRITE_SIDECARS", False)
+
+
+def get_png_compress_metadata() -> bool:
+    # Store large PNG metadata (workflow JSON) in zlib-compressed iTXt chunks
+    return _env_bool("EAGLE_PNG_COMPRESS_METADATA", False)
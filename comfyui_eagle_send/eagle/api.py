@@ -1,45 +1,462 @@
 from __future__ import annotations
+import base64
 import json
-from typing import Any, Dict, List, Tuple, Optional
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple, Optional
+from urllib.parse import urlencode, urlsplit
 
-try:
-    import urllib.request as _urlreq  # type: ignore
-except Exception:  # pragma: no cover
-    _urlreq = None  # type: ignore
+from ..config import (
+    get_batch_window,
+    get_batch_max_items,
+    get_breaker_cooldown,
+    get_breaker_failures,
+    get_probe_timeout,
+    get_send_workers,
+)
+from ..metrics import inc
+from .client import EagleClient, get_client
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
-def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Tuple[int, str]:
-    if _urlreq is None:
-        return 0, "urllib not available in this Python environment"
-    data = json.dumps(payload).encode("utf-8")
-    req = _urlreq.Request(url, data=data, headers=headers, method="POST")
-    try:
-        with _urlreq.urlopen(req, timeout=30) as resp:
-            code = getattr(resp, "status", resp.getcode())
-            text = resp.read().decode("utf-8", errors="replace")
-            return code, text
-    except Exception as exc:  # include HTTPError, URLError
-        if hasattr(exc, "code") and hasattr(exc, "read"):
+# How long a liveness probe result is reused
+_PROBE_TTL = 2.0
+
+
+def is_retryable(code: int) -> bool:
+    # Connection errors (0) and server-side errors are worth another try;
+    # 4xx means the payload itself was rejected.
+    return code == 0 or code >= 500
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return f"{(parts.scheme or 'http').lower()}://{parts.netloc.lower()}"
+
+
+_PROBE_CLIENT: Optional[EagleClient] = None
+_PROBE_CACHE: Dict[str, Tuple[float, bool]] = {}
+_PROBE_LOCK = threading.Lock()
+
+
+def probe_eagle(host: str, max_age: float = _PROBE_TTL) -> bool:
+    """Cheap liveness check (GET /api/application/info) with short timeouts, cached for `max_age` seconds.
+
+    The breaker's half-open check and outbox replay share the cached answer,
+    so a burst of wake-ups costs one request.
+    """
+    global _PROBE_CLIENT
+    key = _host_key(host)
+    now = time.monotonic()
+    with _PROBE_LOCK:
+        cached = _PROBE_CACHE.get(key)
+        if cached is not None and now - cached[0] < max_age:
+            return cached[1]
+        if _PROBE_CLIENT is None:
+            timeout = get_probe_timeout()
+            _PROBE_CLIENT = EagleClient(connect_timeout=timeout, read_timeout=timeout, max_idle_per_host=1)
+        client = _PROBE_CLIENT
+    code, _ = client.request("GET", key + "/api/application/info")
+    alive = 200 <= code < 300
+    inc("probe_ok" if alive else "probe_failed")
+    with _PROBE_LOCK:
+        _PROBE_CACHE[key] = (time.monotonic(), alive)
+    return alive
+
+
+class _Circuit:
+    __slots__ = ("state", "failures", "opened_at")
+
+    def __init__(self):
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker for Eagle requests.
+
+    closed: requests pass; `failures` consecutive connection errors or 5xx
+    responses open the circuit. open: requests fail immediately with status 0
+    until `cooldown` seconds have passed. Then a liveness probe decides: if
+    Eagle answers, one trial request is let through (half-open) and its result
+    closes or re-opens the circuit; otherwise the cool-down starts again.
+    Listeners are told (with the host key) when a host answers again after
+    failures, e.g. so the outbox replays without waiting for its interval.
+    """
+
+    def __init__(self, failures: int, cooldown: float):
+        self.threshold = max(1, int(failures))
+        self.cooldown = max(0.0, float(cooldown))
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, _Circuit] = {}
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _recovered(self, key: str) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
             try:
-                text = exc.read().decode("utf-8", errors="replace")
+                listener(key)
             except Exception:
-                text = str(exc)
-            return int(getattr(exc, "code", 0) or 0), text
+                pass
+
+    def _circuit(self, key: str) -> _Circuit:
+        c = self._circuits.get(key)
+        if c is None:
+            c = self._circuits[key] = _Circuit()
+        return c
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            return self._circuit(_host_key(host)).state
+
+    def allow(self, host: str) -> bool:
+        key = _host_key(host)
+        with self._lock:
+            c = self._circuit(key)
+            if c.state == "closed":
+                return True
+            if c.state == "half_open" or time.monotonic() - c.opened_at < self.cooldown:
+                return False
+            # Cool-down over: claim the trial before probing so only one caller probes
+            c.state = "half_open"
+        if probe_eagle(key):
+            self._recovered(key)
+            return True
+        with self._lock:
+            c.state = "open"
+            c.opened_at = time.monotonic()
+        return False
+
+    def record(self, host: str, code: int) -> None:
+        key = _host_key(host)
+        with self._lock:
+            c = self._circuit(key)
+            if not is_retryable(code):
+                # Any answer from Eagle (even 4xx) means it is up
+                recovered = c.state != "closed" or c.failures > 0
+                c.state = "closed"
+                c.failures = 0
+            else:
+                recovered = False
+                c.failures += 1
+                if c.state == "half_open" or c.failures >= self.threshold:
+                    if c.state != "open":
+                        inc("breaker_opened")
+                    c.state = "open"
+                    c.opened_at = time.monotonic()
+        if recovered:
+            self._recovered(key)
+
+
+_BREAKER: Optional[CircuitBreaker] = None
+_BREAKER_LOCK = threading.Lock()
+
+
+def get_breaker() -> CircuitBreaker:
+    global _BREAKER
+    with _BREAKER_LOCK:
+        if _BREAKER is None:
+            _BREAKER = CircuitBreaker(get_breaker_failures(), get_breaker_cooldown())
+        return _BREAKER
+
+
+def request_eagle(
+    method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, str]:
+    """Request through the shared client, guarded by the circuit breaker (status 0 when open)."""
+    breaker = get_breaker()
+    if not breaker.allow(url):
+        inc("breaker_short_circuits")
+        return 0, "Eagle unavailable (circuit open)"
+    code, text = get_client().request(method, url, body=body, headers=headers)
+    breaker.record(url, code)
+    return code, text
+
+
+def _post_json(url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Tuple[int, str]:
+    # Reuses pooled keep-alive connections (see eagle/client.py)
+    try:
+        data = json.dumps(payload).encode("utf-8")
+    except Exception as exc:
         return 0, str(exc)
+    return request_eagle("POST", url, body=data, headers=headers)
 
 
-def send_to_eagle(host: str, paths: List[str], tags: List[str], annotation: Optional[str] = None) -> Tuple[int, str]:
+def _add_from_paths_url(host: str) -> str:
     base = host.strip().rstrip("/")
-    url = base + "/api/item/addFromPaths"
+    return base + "/api/item/addFromPaths"
+
+
+def _build_items(paths: List[str], tags: List[str], annotation: Optional[str]) -> List[Dict[str, Any]]:
     items: List[Dict[str, Any]] = []
     for p in paths:
-        item: Dict[str, Any] = {"path": p}
+        # Explicit name (file name without extension) so the item can be found again by name
+        item: Dict[str, Any] = {"path": p, "name": os.path.splitext(os.path.basename(p))[0]}
         if tags:
             item["tags"] = tags
         if annotation:
             # Eagle memo field (annotation text)
             item["annotation"] = annotation
         items.append(item)
+    return items
+
+
+def _items_payload(items: List[Dict[str, Any]], folder_id: Optional[str]) -> Dict[str, Any]:
     payload: Dict[str, Any] = {"items": items}
-    headers = {"Content-Type": "application/json"}
-    return _post_json(url, payload, headers)
+    if folder_id:
+        # addFromPaths/addFromURLs take one target folder for all items
+        payload["folderId"] = folder_id
+    return payload
+
+
+def send_to_eagle(
+    host: str,
+    paths: List[str],
+    tags: List[str],
+    annotation: Optional[str] = None,
+    folder_id: Optional[str] = None,
+) -> Tuple[int, str]:
+    url = _add_from_paths_url(host)
+    payload = _items_payload(_build_items(paths, tags, annotation), folder_id)
+    return _post_json(url, payload, dict(_JSON_HEADERS))
+
+
+def post_items(host: str, items: List[Dict[str, Any]], folder_id: Optional[str] = None) -> Tuple[int, str]:
+    """Post already built addFromPaths items (used to replay the outbox)."""
+    return _post_json(_add_from_paths_url(host), _items_payload(items, folder_id), dict(_JSON_HEADERS))
+
+
+# In-memory images: (name without extension, encoded bytes, MIME type)
+Blob = Tuple[str, bytes, str]
+
+
+def _add_from_urls_url(host: str) -> str:
+    base = host.strip().rstrip("/")
+    return base + "/api/item/addFromURLs"
+
+
+def _build_url_items(blobs: List[Blob], tags: List[str], annotation: Optional[str]) -> List[Dict[str, Any]]:
+    items: List[Dict[str, Any]] = []
+    for name, data, mime in blobs:
+        # Eagle accepts base64 data URLs wherever it accepts image URLs
+        item: Dict[str, Any] = {
+            "url": f"data:{mime};base64," + base64.b64encode(data).decode("ascii"),
+            "name": name,
+        }
+        if tags:
+            item["tags"] = tags
+        if annotation:
+            item["annotation"] = annotation
+        items.append(item)
+    return items
+
+
+def send_bytes_to_eagle(
+    host: str,
+    blobs: List[Blob],
+    tags: List[str],
+    annotation: Optional[str] = None,
+    folder_id: Optional[str] = None,
+) -> Tuple[int, str]:
+    """Import encoded images directly (no file on disk) through /api/item/addFromURLs."""
+    url = _add_from_urls_url(host)
+    payload = _items_payload(_build_url_items(blobs, tags, annotation), folder_id)
+    return _post_json(url, payload, dict(_JSON_HEADERS))
+
+
+def _get_data(url: str) -> Any:
+    # "data" of a successful Eagle GET, or None
+    code, text = request_eagle("GET", url)
+    if not 200 <= code < 300:
+        return None
+    try:
+        return json.loads(text).get("data")
+    except Exception:
+        return None
+
+
+def get_item(host: str, item_id: str) -> Optional[Dict[str, Any]]:
+    """Eagle item by id (/api/item/info), or None if it no longer exists."""
+    url = host.strip().rstrip("/") + "/api/item/info?" + urlencode({"id": item_id})
+    item = _get_data(url)
+    return item if isinstance(item, dict) and item.get("id") == item_id else None
+
+
+def find_item(host: str, name: str) -> Optional[Dict[str, Any]]:
+    """The one Eagle item named exactly `name` (via /api/item/list?keyword=).
+
+    None when there is no such item or several share the name: tagging a
+    guess could change the wrong image.
+    """
+    url = host.strip().rstrip("/") + "/api/item/list?" + urlencode({"keyword": name, "limit": 50})
+    data = _get_data(url)
+    matches = [
+        item for item in (data if isinstance(data, list) else [])
+        if isinstance(item, dict) and item.get("name") == name and item.get("id")
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+
+def add_tags_to_item(host: str, item: Dict[str, Any], tags: List[str]) -> Tuple[int, str]:
+    """Merge `tags` into an existing item's tags (item/update replaces the list)."""
+    existing = [t for t in (item.get("tags") or []) if isinstance(t, str)]
+    merged = list(dict.fromkeys(existing + list(tags)))
+    if len(merged) == len(existing):
+        return 200, json.dumps({"status": "success", "data": {"id": item.get("id"), "unchanged": True}})
+    url = host.strip().rstrip("/") + "/api/item/update"
+    return _post_json(url, {"id": item["id"], "tags": merged}, dict(_JSON_HEADERS))
+
+
+# Pending batches are keyed by (endpoint URL, folder id or "")
+_BatchKey = Tuple[str, str]
+
+
+class _Batch:
+    __slots__ = ("deadline", "items", "futures", "size")
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.items: List[Dict[str, Any]] = []
+        self.futures: List[Future] = []
+        # Approximate payload bytes (dominated by base64 data URLs)
+        self.size = 0
+
+
+class AddFromPathsBatcher:
+    """Coalesces addFromPaths (and addFromURLs) items from many callers into one request.
+
+    Items are collected per endpoint URL and target folder until `window` seconds have passed
+    since the first pending item, or `max_items` items or about `max_bytes` of
+    inline image data are waiting, then posted
+    as a single `items` payload by a background flusher. Every caller gets a
+    Future resolving to the (status, body) of the request carrying its items.
+    """
+
+    def __init__(self, window: float, max_items: int, max_bytes: int = 32 * 1024 * 1024):
+        self._window = max(0.0, float(window))
+        self._max_items = max(1, int(max_items))
+        self._max_bytes = max(1, int(max_bytes))
+        self._cond = threading.Condition()
+        self._pending: Dict[_BatchKey, _Batch] = {}
+        self._full: List[Tuple[_BatchKey, _Batch]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, url: str, items: List[Dict[str, Any]], folder_id: Optional[str] = None) -> Future:
+        fut: Future = Future()
+        key = (url, folder_id or "")
+        with self._cond:
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = _Batch(time.monotonic() + self._window)
+                self._pending[key] = batch
+            batch.items.extend(items)
+            batch.futures.append(fut)
+            batch.size += sum(len(item.get("url") or "") for item in items)
+            if len(batch.items) >= self._max_items or batch.size >= self._max_bytes:
+                # Seal the batch so later callers start a new one
+                self._full.append((key, self._pending.pop(key)))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="EagleBatcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return fut
+
+    def _take_ready(self) -> List[Tuple[_BatchKey, _Batch]]:
+        # Called with the condition held; blocks until at least one batch is due
+        while True:
+            now = time.monotonic()
+            ready = [key for key, b in self._pending.items() if b.deadline <= now]
+            if ready or self._full:
+                out = self._full + [(key, self._pending.pop(key)) for key in ready]
+                self._full = []
+                return out
+            timeout = None
+            if self._pending:
+                timeout = max(0.0, min(b.deadline for b in self._pending.values()) - now)
+            self._cond.wait(timeout)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                batches = self._take_ready()
+            for (url, folder_id), batch in batches:
+                try:
+                    result = _post_json(url, _items_payload(batch.items, folder_id), dict(_JSON_HEADERS))
+                except Exception as exc:
+                    result = (0, str(exc))
+                # Drop the base64 payload before callers' done-callbacks run
+                batch.items = []
+                for fut in batch.futures:
+                    fut.set_result(result)
+            del batches
+
+
+_BATCHER: Optional[AddFromPathsBatcher] = None
+_BATCHER_LOCK = threading.Lock()
+
+
+def get_batcher() -> Optional[AddFromPathsBatcher]:
+    """Shared batcher, or None when coalescing is disabled (window of 0)."""
+    global _BATCHER
+    window = get_batch_window()
+    if window <= 0:
+        return None
+    with _BATCHER_LOCK:
+        if _BATCHER is None:
+            _BATCHER = AddFromPathsBatcher(window, get_batch_max_items())
+        return _BATCHER
+
+
+_SENDER: Optional[ThreadPoolExecutor] = None
+
+
+def _get_sender() -> ThreadPoolExecutor:
+    global _SENDER
+    with _BATCHER_LOCK:
+        if _SENDER is None:
+            _SENDER = ThreadPoolExecutor(max_workers=get_send_workers(), thread_name_prefix="EagleSender")
+        return _SENDER
+
+
+def submit_to_eagle(
+    host: str,
+    paths: List[str],
+    tags: List[str],
+    annotation: Optional[str] = None,
+    folder_id: Optional[str] = None,
+) -> Future:
+    """Non-blocking send_to_eagle, coalesced with other callers when batching is enabled.
+
+    Returns a Future of (status, body).
+    """
+    batcher = get_batcher()
+    if batcher is None:
+        return _get_sender().submit(send_to_eagle, host, paths, tags, annotation, folder_id)
+    return batcher.submit(_add_from_paths_url(host), _build_items(paths, tags, annotation), folder_id)
+
+
+def submit_bytes_to_eagle(
+    host: str,
+    blobs: List[Blob],
+    tags: List[str],
+    annotation: Optional[str] = None,
+    folder_id: Optional[str] = None,
+) -> Future:
+    """Non-blocking send_bytes_to_eagle; see submit_to_eagle."""
+    batcher = get_batcher()
+    if batcher is None:
+        return _get_sender().submit(send_bytes_to_eagle, host, blobs, tags, annotation, folder_id)
+    return batcher.submit(_add_from_urls_url(host), _build_url_items(blobs, tags, annotation), folder_id)
+
+
+def submit_add_tags(host: str, item: Dict[str, Any], tags: List[str]) -> Future:
+    """Non-blocking add_tags_to_item; returns a Future of (status, body)."""
+    return _get_sender().submit(add_tags_to_item, host, item, tags)
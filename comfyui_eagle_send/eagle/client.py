@@ -0,0 +1,181 @@
+from __future__ import annotations
+import http.client
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from ..config import get_connect_timeout, get_read_timeout
+from ..metrics import inc, observe
+
+# Errors that mean an idle keep-alive connection was closed by the server
+# before we reused it; the request is retried once on a fresh connection, but
+# only when Eagle cannot have acted on it (see EagleClient._request).
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+# Safe to send twice even if the first attempt reached Eagle
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_PoolKey = Tuple[str, str, int]
+
+
+class EagleClient:
+    """Small thread-safe HTTP/1.1 client with per-host keep-alive pools.
+
+    Each request borrows an idle connection for its host (or opens a new one)
+    and returns it afterwards, so concurrent threads never share a socket.
+    """
+
+    def __init__(self, connect_timeout: float = 10.0, read_timeout: float = 30.0, max_idle_per_host: int = 8):
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.max_idle_per_host = max(1, int(max_idle_per_host))
+        self._idle: Dict[_PoolKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _split(url: str) -> Tuple[_PoolKey, str]:
+        parts = urlsplit(url)
+        scheme = (parts.scheme or "http").lower()
+        host = parts.hostname or "127.0.0.1"
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return (scheme, host, port), path
+
+    def _new_connection(self, key: _PoolKey) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(host, port, timeout=self.connect_timeout)
+        conn.connect()
+        if conn.sock is not None:
+            conn.sock.settimeout(self.read_timeout)
+            try:
+                # Small JSON requests on a reused socket must not wait on Nagle/delayed ACK
+                conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except Exception:
+                pass
+        return conn
+
+    def _acquire(self, key: _PoolKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._new_connection(key), False
+
+    def _release(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _discard_idle(self, key: _PoolKey) -> None:
+        with self._lock:
+            idle = self._idle.pop(key, [])
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle = {}
+        for idle in pools:
+            for conn in idle:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, str]:
+        """Perform a request and return (status, body text); status 0 on connection errors."""
+        t0 = time.perf_counter()
+        status, text = self._request(method, url, body, headers)
+        observe("http_request", time.perf_counter() - t0)
+        inc("http_requests")
+        if body:
+            inc("http_bytes_sent", len(body))
+        if status == 0 or status >= 400:
+            inc("http_errors")
+        return status, text
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+    ) -> Tuple[int, str]:
+        key, path = self._split(url)
+        hdrs = dict(headers or {})
+        hdrs.setdefault("Connection", "keep-alive")
+        for _ in range(2):
+            try:
+                conn, reused = self._acquire(key)
+            except Exception as exc:
+                return 0, str(exc)
+            # A POST (addFromPaths, folder/create, ...) is only repeated when
+            # Eagle cannot have processed it: writing the request failed, or the
+            # socket closed without a single response byte (RemoteDisconnected).
+            # Once Eagle may have read the body, a retry could duplicate items.
+            retry_safe = method.upper() in _IDEMPOTENT_METHODS
+            try:
+                try:
+                    conn.request(method, path, body=body, headers=hdrs)
+                except _STALE_ERRORS:
+                    retry_safe = True
+                    raise
+                try:
+                    resp = conn.getresponse()
+                except http.client.RemoteDisconnected:
+                    retry_safe = True
+                    raise
+                data = resp.read()
+            except _STALE_ERRORS as exc:
+                conn.close()
+                if reused and retry_safe:
+                    # Other idle sockets to this host are likely stale too
+                    self._discard_idle(key)
+                    inc("http_reconnects")
+                    continue
+                return 0, str(exc)
+            except Exception as exc:
+                conn.close()
+                return 0, str(exc)
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return int(resp.status or 0), data.decode("utf-8", errors="replace")
+        return 0, "connection closed by server"
+
+
+_CLIENT: Optional[EagleClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> EagleClient:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = EagleClient(connect_timeout=get_connect_timeout(), read_timeout=get_read_timeout())
+        return _CLIENT
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_folder_cache_ttl
+from .api import request_eagle
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# A miss refetches the tree (the folder may have been made in Eagle since)
+# at most this often before missing folders are created.
+_MISS_RELOAD_SECONDS = 2.0
+
+_FolderKey = Tuple[str, ...]
+
+
+def expand_folder_path(path: str) -> str:
+    """Replace %date% (YYYY-MM-DD) and %datetime% (yyyymmdd_HHmmss) in a folder path."""
+    if not isinstance(path, str) or "%" not in path:
+        return path or ""
+    now = datetime.now()
+    return path.replace("%datetime%", now.strftime("%Y%m%d_%H%M%S")).replace("%date%", now.strftime("%Y-%m-%d"))
+
+
+def split_folder_path(path: str) -> List[str]:
+    # "Projects/ClientA\\2024" -> ["Projects", "ClientA", "2024"]
+    return [p.strip() for p in (path or "").replace("\\", "/").split("/") if p.strip()]
+
+
+def _fold(name: str) -> str:
+    return name.strip().casefold()
+
+
+class FolderIndex:
+    """Cached Eagle folder tree for one host: folder path -> folder id.
+
+    The tree comes from a single /api/folder/list call and is reused for
+    `ttl` seconds, so resolving a folder normally costs no request. Folders
+    missing from the tree are created with /api/folder/create. Names match
+    case-insensitively; when siblings share a name the first one wins.
+    """
+
+    def __init__(self, host: str, ttl: float):
+        self._base = host.strip().rstrip("/")
+        self.ttl = max(0.0, float(ttl))
+        self._lock = threading.Lock()
+        self._tree: Optional[Dict[_FolderKey, str]] = None
+        self._loaded_at = 0.0
+
+    def _fetch(self) -> Tuple[Optional[Dict[_FolderKey, str]], int]:
+        # (tree, status); the tree is None on failure and status 0 when Eagle was unreachable
+        code, text = request_eagle("GET", self._base + "/api/folder/list")
+        if not 200 <= code < 300:
+            return None, code
+        try:
+            data = json.loads(text).get("data")
+        except Exception:
+            return None, code
+        if not isinstance(data, list):
+            return None, code
+        tree: Dict[_FolderKey, str] = {}
+        stack: List[Tuple[_FolderKey, Any]] = [((), data)]
+        while stack:
+            prefix, nodes = stack.pop()
+            for node in nodes if isinstance(nodes, list) else []:
+                if not isinstance(node, dict):
+                    continue
+                name, fid = node.get("name"), node.get("id")
+                if not isinstance(name, str) or not fid:
+                    continue
+                key = prefix + (_fold(name),)
+                if key not in tree:
+                    tree[key] = str(fid)
+                stack.append((key, node.get("children")))
+        return tree, code
+
+    def _reload(self) -> int:
+        tree, code = self._fetch()
+        if tree is not None:
+            self._tree = tree
+            self._loaded_at = time.monotonic()
+        return code
+
+    def _create(self, name: str, parent_id: Optional[str]) -> Tuple[Optional[str], int]:
+        payload: Dict[str, Any] = {"folderName": name}
+        if parent_id:
+            payload["parent"] = parent_id
+        code, text = request_eagle(
+            "POST", self._base + "/api/folder/create",
+            body=json.dumps(payload).encode("utf-8"), headers=dict(_JSON_HEADERS),
+        )
+        if not 200 <= code < 300:
+            return None, code
+        try:
+            fid = (json.loads(text).get("data") or {}).get("id")
+        except Exception:
+            return None, code
+        return (str(fid) if fid else None), code
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tree = None
+
+    def resolve(self, path: str, create: bool = True) -> Optional[str]:
+        """Folder id for `path` ("A/B/C"), creating missing folders; None if unavailable."""
+        return self.resolve_status(path, create)[0]
+
+    def resolve_status(self, path: str, create: bool = True) -> Tuple[Optional[str], int]:
+        """Like resolve(), plus the status of the request that failed (0: Eagle unreachable)."""
+        parts = split_folder_path(path)
+        if not parts:
+            return None, 200
+        key = tuple(_fold(p) for p in parts)
+        # Held across requests so concurrent sends never create the same folder twice
+        with self._lock:
+            code = 200
+            if self._tree is None or time.monotonic() - self._loaded_at >= self.ttl:
+                code = self._reload()
+            if self._tree is None:
+                return None, code
+            fid = self._tree.get(key)
+            if fid or not create:
+                return fid, 200
+            if time.monotonic() - self._loaded_at >= _MISS_RELOAD_SECONDS:
+                self._reload()
+                fid = self._tree.get(key)
+                if fid:
+                    return fid, 200
+            parent: Optional[str] = None
+            for i, name in enumerate(parts):
+                sub = key[: i + 1]
+                fid = self._tree.get(sub)
+                if fid is None:
+                    fid, code = self._create(name, parent)
+                    if fid is None:
+                        return None, code
+                    self._tree[sub] = fid
+                parent = fid
+            return parent, 200
+
+
+_INDEXES: Dict[str, FolderIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_folder_index(host: str) -> FolderIndex:
+    key = host.strip().rstrip("/")
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is None:
+            idx = _INDEXES[key] = FolderIndex(key, get_folder_cache_ttl())
+        return idx
+
+
+def resolve_folder_id(host: str, folder: str) -> Optional[str]:
+    """Expand tokens in `folder` and return its Eagle folder id (created if missing)."""
+    return resolve_folder(host, folder)[0]
+
+
+def resolve_folder(host: str, folder: str) -> Tuple[Optional[str], int]:
+    """resolve_folder_id() plus a status: 0 when Eagle could not be reached (retry
+    later), the failing HTTP status when Eagle refused the folder, else 200."""
+    path = expand_folder_path(folder)
+    if not split_folder_path(path):
+        return None, 200
+    try:
+        return get_folder_index(host).resolve_status(path)
+    except Exception:
+        return None, 0
@@ -0,0 +1,386 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import (
+    get_batch_max_items,
+    get_hash_cache_dir,
+    get_outbox_enabled,
+    get_outbox_max_attempts,
+    get_outbox_retry_interval,
+)
+from ..image.formats import EXTENSIONS, MIME_TYPES
+from ..metrics import inc
+from .api import Blob, _build_items, _host_key, get_breaker, is_retryable, post_items, probe_eagle
+from .folders import resolve_folder
+
+# Journal records, one JSON object per line:
+#   {"op": "add", "id", "seq", "host", "folder_id", "folder", "items", "spooled", "ts"}
+#   "folder" is the requested folder path when its id could not be resolved
+#   (Eagle was down); it is resolved when the entry is replayed.
+#   "dedupe" holds [frame digest, item name] pairs recorded as sent (see
+#   image/dedupe.py) once the entry is delivered.
+#   {"op": "fail", "id", "attempts"} Eagle answered the entry alone with a 5xx
+#   {"op": "ack", "id", "result"}    result: "sent" or "dropped" (rejected by Eagle,
+#                                     or still failing after max_attempts)
+# Pending entries are the adds without a matching ack, replayed in seq order.
+
+# Rewrite the journal once this many acked entries have accumulated
+_COMPACT_AFTER = 256
+
+# MIME type -> file extension for spooled in-memory images
+_EXTENSIONS = {MIME_TYPES[fmt]: ext for fmt, ext in EXTENSIONS.items()}
+
+
+def _entry_id(host: str, folder_id: Optional[str], folder: Optional[str], items: List[Dict[str, Any]]) -> str:
+    # Same images to the same place -> same id, so a repeated failure is journaled once
+    key = json.dumps([host, folder_id or "", folder or "", items], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class Outbox:
+    """Append-only on-disk journal of sends that could not be delivered.
+
+    Entries are replayed in order by a background flusher, coalescing
+    consecutive entries for the same host and folder into one request. The
+    first failure stops the pass for that host so order is preserved. Images
+    that were only in memory are spooled to files next to the journal first.
+    """
+
+    def __init__(
+        self, journal_path: str, spool_dir: str, retry_interval: float, batch_max_items: int, max_attempts: int = 5
+    ):
+        self.journal_path = journal_path
+        self.spool_dir = spool_dir
+        self.retry_interval = max(1.0, float(retry_interval))
+        self.batch_max_items = max(1, int(batch_max_items))
+        self.max_attempts = max(1, int(max_attempts))
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._seq = 0
+        self._acked_lines = 0
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except Exception:
+            return
+        adds: Dict[str, Dict[str, Any]] = {}
+        for line in lines:
+            try:
+                rec = json.loads(line)
+            except Exception:
+                # Torn last line after a crash
+                continue
+            if not isinstance(rec, dict):
+                continue
+            if rec.get("op") == "add" and rec.get("id"):
+                adds.setdefault(rec["id"], rec)
+                self._seq = max(self._seq, int(rec.get("seq") or 0))
+            elif rec.get("op") == "fail" and rec.get("id") in adds:
+                adds[rec["id"]]["attempts"] = int(rec.get("attempts") or 0)
+            elif rec.get("op") == "ack":
+                if adds.pop(rec.get("id"), None) is not None:
+                    self._acked_lines += 1
+        for rec in sorted(adds.values(), key=lambda r: int(r.get("seq") or 0)):
+            self._pending[rec["id"]] = rec
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        # Called with the lock held
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self) -> None:
+        # Called with the lock held; keeps only pending adds
+        tmp = f"{self.journal_path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in self._pending.values():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+        self._acked_lines = 0
+
+    def _spool(self, blobs: List[Blob]) -> List[str]:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        paths: List[str] = []
+        for name, data, mime in blobs:
+            digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+            path = os.path.join(self.spool_dir, f"{name}-{digest}.{_EXTENSIONS.get(mime, 'bin')}")
+            if not os.path.exists(path):
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+            paths.append(path)
+        return paths
+
+    def pending(self, host: Optional[str] = None) -> int:
+        with self._lock:
+            if host is None:
+                return len(self._pending)
+            return sum(1 for rec in self._pending.values() if rec.get("host") == host)
+
+    def has_pending(self, host: str) -> bool:
+        return self.pending(host) > 0
+
+    def add(
+        self,
+        host: str,
+        paths: List[str],
+        tags: List[str],
+        annotation: Optional[str] = None,
+        folder_id: Optional[str] = None,
+        blobs: Optional[List[Blob]] = None,
+        folder: Optional[str] = None,
+        dedupe: Optional[List[Tuple[str, str]]] = None,
+    ) -> Optional[str]:
+        """Journal a send for later delivery; returns the entry id (None if it could not be written).
+
+        Pass `folder` (an expanded folder path) instead of `folder_id` when the
+        id could not be resolved; it is looked up again on replay.
+        """
+        folder = None if folder_id else (folder or None)
+        try:
+            spooled = self._spool(blobs) if blobs else []
+            items = _build_items(list(paths) + spooled, tags, annotation)
+            if blobs:
+                # Keep the original item names instead of the spool file names
+                for item, (name, _, _) in zip(items[len(paths):], blobs):
+                    item["name"] = name
+            entry_id = _entry_id(host, folder_id, folder, items)
+            with self._lock:
+                if entry_id not in self._pending:
+                    self._seq += 1
+                    rec = {
+                        "op": "add",
+                        "id": entry_id,
+                        "seq": self._seq,
+                        "host": host,
+                        "folder_id": folder_id,
+                        "folder": folder,
+                        "dedupe": [list(e) for e in dedupe or []],
+                        "items": items,
+                        "spooled": spooled,
+                        "ts": time.time(),
+                    }
+                    self._append([rec])
+                    self._pending[entry_id] = rec
+                    inc("outbox_added")
+            self._ensure_flusher()
+            return entry_id
+        except Exception:
+            return None
+
+    def _ack(self, recs: List[Dict[str, Any]], result: str) -> None:
+        with self._lock:
+            acks = [{"op": "ack", "id": rec["id"], "result": result} for rec in recs if rec["id"] in self._pending]
+            if not acks:
+                return
+            self._append(acks)
+            for ack in acks:
+                self._pending.pop(ack["id"], None)
+            self._acked_lines += len(acks)
+            if self._acked_lines >= _COMPACT_AFTER:
+                try:
+                    self._compact()
+                except Exception:
+                    pass
+        inc("outbox_" + result, len(acks))
+        if result == "sent":
+            self._record_sent(recs)
+        for rec in recs:
+            for path in rec.get("spooled") or []:
+                try:
+                    os.remove(path)
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _record_sent(recs: List[Dict[str, Any]]) -> None:
+        # Frames count as sent for duplicate detection only once Eagle has them
+        by_host: Dict[str, List[Tuple[str, str]]] = {}
+        for rec in recs:
+            for pair in rec.get("dedupe") or []:
+                if isinstance(pair, list) and len(pair) == 2:
+                    by_host.setdefault(rec.get("host") or "", []).append((pair[0], pair[1]))
+        if not by_host:
+            return
+        try:
+            from ..image.dedupe import get_sent_index
+
+            for host, entries in by_host.items():
+                get_sent_index().record(host, entries)
+        except Exception:
+            pass
+
+    def _next_batch(self, host: str) -> List[Dict[str, Any]]:
+        # Oldest pending entries for `host` sharing its folder, up to batch_max_items items
+        with self._lock:
+            batch: List[Dict[str, Any]] = []
+            count = 0
+            for rec in self._pending.values():
+                if rec.get("host") != host:
+                    continue
+                if batch and (rec.get("folder_id") != batch[0].get("folder_id")
+                              or rec.get("folder") != batch[0].get("folder")
+                              or count + len(rec["items"]) > self.batch_max_items):
+                    break
+                batch.append(rec)
+                count += len(rec["items"])
+            return batch
+
+    def _post(self, host: str, batch: List[Dict[str, Any]]) -> int:
+        folder_id = batch[0].get("folder_id")
+        if not folder_id and batch[0].get("folder"):
+            folder_id, status = resolve_folder(host, batch[0]["folder"])
+            if not folder_id:
+                if status == 0:
+                    # Still unreachable; the requested folder must not be lost
+                    return 0
+                # Eagle is up but refused the folder: import without it rather
+                # than holding back every later send for the host
+                inc("outbox_folder_fallbacks", len(batch))
+        items = [item for rec in batch for item in rec["items"]]
+        try:
+            code, _ = post_items(host, items, folder_id)
+        except Exception:
+            code = 0
+        return code
+
+    def _failed(self, rec: Dict[str, Any]) -> bool:
+        # Count a 5xx for one entry; True once it has used up max_attempts
+        with self._lock:
+            if rec["id"] not in self._pending:
+                return False
+            rec["attempts"] = int(rec.get("attempts") or 0) + 1
+            try:
+                self._append([{"op": "fail", "id": rec["id"], "attempts": rec["attempts"]}])
+            except Exception:
+                pass
+            return rec["attempts"] >= self.max_attempts
+
+    def _settle(self, rec: Dict[str, Any], code: int) -> bool:
+        """Ack or count one entry's own response; False if the pass should stop here."""
+        if 200 <= code < 300:
+            self._ack([rec], "sent")
+        elif not is_retryable(code):
+            # Rejected payload (e.g. file deleted); never blocks later entries
+            self._ack([rec], "dropped")
+        elif code != 0 and self._failed(rec):
+            # Eagle is up but keeps failing on this entry: stop it from holding
+            # every later send for the host back
+            self._ack([rec], "dropped")
+        else:
+            return False
+        return True
+
+    def flush(self) -> int:
+        """Replay pending entries host by host until one fails; returns entries delivered."""
+        delivered = 0
+        with self._lock:
+            hosts = list(dict.fromkeys(rec.get("host") for rec in self._pending.values()))
+        for host in hosts:
+            # Spooled payloads are not read and uploaded while Eagle is down; the
+            # cached probe keeps frequent wake-ups to one request
+            if not probe_eagle(host):
+                continue
+            while True:
+                batch = self._next_batch(host)
+                if not batch:
+                    break
+                code = self._post(host, batch)
+                if 200 <= code < 300:
+                    self._ack(batch, "sent")
+                    delivered += len(batch)
+                    continue
+                if code == 0:
+                    # Unreachable: nothing to learn about the entries themselves
+                    break
+                # One bad entry must not take the others down with it: a failed
+                # coalesced batch is replayed entry by entry
+                stopped = False
+                for rec in batch:
+                    c = code if len(batch) == 1 else self._post(host, [rec])
+                    if not self._settle(rec, c):
+                        stopped = True
+                        break
+                    if 200 <= c < 300:
+                        delivered += 1
+                if stopped:
+                    break
+        return delivered
+
+    def _ensure_flusher(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="EagleOutbox", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait(self.retry_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
+            with self._lock:
+                # Checked under the lock add() holds, so no entry is left without a flusher
+                if not self._pending:
+                    self._thread = None
+                    return
+
+    def wake(self) -> None:
+        """Replay now instead of at the next interval."""
+        self._wake.set()
+
+    def on_host_recovered(self, host_key: str) -> None:
+        # Circuit breaker listener; host_key is "scheme://netloc" (see api._host_key)
+        with self._lock:
+            waiting = any(_host_key(rec.get("host") or "") == host_key for rec in self._pending.values())
+        if waiting:
+            self.wake()
+
+
+_OUTBOX: Optional[Outbox] = None
+_OUTBOX_LOCK = threading.Lock()
+
+
+def get_outbox() -> Optional[Outbox]:
+    """Shared outbox, or None when disabled (EAGLE_OUTBOX=0)."""
+    global _OUTBOX
+    if not get_outbox_enabled():
+        return None
+    with _OUTBOX_LOCK:
+        if _OUTBOX is None:
+            root = get_hash_cache_dir() or os.path.dirname(os.path.dirname(__file__))
+            _OUTBOX = Outbox(
+                os.path.join(root, "eagle_outbox.jsonl"),
+                os.path.join(root, "eagle_outbox"),
+                get_outbox_retry_interval(),
+                get_batch_max_items(),
+                get_outbox_max_attempts(),
+            )
+            if _OUTBOX.pending():
+                # Entries left over from a previous run
+                _OUTBOX._ensure_flusher()
+            # Replay as soon as Eagle answers again instead of at the next interval
+            get_breaker().add_listener(_OUTBOX.on_host_recovered)
+        return _OUTBOX
@@ -0,0 +1,200 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import (
+    get_send_workers,
+    get_send_queue_size,
+    get_send_retries,
+    get_send_retry_backoff,
+)
+from ..metrics import inc
+from .api import Blob, is_retryable, submit_to_eagle, submit_bytes_to_eagle
+from .outbox import get_outbox
+
+# Number of finished job statuses kept for lookups via get_job_status()
+_STATUS_HISTORY = 1024
+
+
+class _Job:
+    __slots__ = (
+        "job_id", "host", "paths", "blobs", "tags", "annotation", "folder_id", "dedupe", "attempts", "created",
+    )
+
+    def __init__(
+        self,
+        host: str,
+        paths: List[str],
+        tags: List[str],
+        annotation: Optional[str],
+        blobs: Optional[List[Blob]] = None,
+        folder_id: Optional[str] = None,
+        dedupe: Optional[List[Tuple[str, str]]] = None,
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.host = host
+        self.paths = list(paths)
+        self.blobs = list(blobs) if blobs else []
+        self.tags = list(tags)
+        self.annotation = annotation
+        self.folder_id = folder_id
+        # (frame digest, item name) pairs recorded as sent once the job succeeds
+        self.dedupe = list(dedupe) if dedupe else []
+        self.attempts = 0
+        self.created = time.time()
+
+
+def _record_sent(host: str, entries: List[Tuple[str, str]]) -> None:
+    try:
+        from ..image.dedupe import get_sent_index
+
+        get_sent_index().record(host, entries)
+    except Exception:
+        pass
+
+
+class SendQueue:
+    """Bounded background worker pool for Eagle submissions.
+
+    submit() returns immediately with a job id once a slot is free. The number
+    of outstanding jobs (queued, in flight or waiting for a retry) is capped by
+    max_pending; callers block up to `timeout` seconds for a slot and get
+    queue.Full when none frees up (backpressure).
+    """
+
+    def __init__(self, workers: int, max_pending: int, retries: int, backoff: float):
+        self._retries = max(0, int(retries))
+        self._backoff = max(0.0, float(backoff))
+        self._slots = threading.BoundedSemaphore(max(1, int(max_pending)))
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._status: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        for i in range(max(1, int(workers))):
+            t = threading.Thread(target=self._worker, name=f"EagleSend-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(
+        self,
+        host: str,
+        paths: List[str],
+        tags: List[str],
+        annotation: Optional[str] = None,
+        timeout: Optional[float] = None,
+        blobs: Optional[List[Blob]] = None,
+        folder_id: Optional[str] = None,
+        dedupe: Optional[List[Tuple[str, str]]] = None,
+    ) -> str:
+        """Queue a send of files (`paths`) or in-memory images (`blobs`)."""
+        if not self._slots.acquire(timeout=timeout):
+            raise queue.Full("Eagle send queue is full")
+        job = _Job(host, paths, tags, annotation, blobs=blobs, folder_id=folder_id, dedupe=dedupe)
+        self._set_status(job, "queued")
+        self._queue.put(job)
+        return job.job_id
+
+    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            st = self._status.get(job_id)
+            return dict(st) if st is not None else None
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for st in self._status.values() if st.get("state") in ("queued", "sending", "retrying"))
+
+    def _set_status(self, job: _Job, state: str, code: Optional[int] = None, body: Optional[str] = None) -> None:
+        with self._lock:
+            self._status[job.job_id] = {
+                "state": state,
+                "attempts": job.attempts,
+                "http": code,
+                "body": body,
+                "paths": len(job.paths) + len(job.blobs),
+            }
+            self._status.move_to_end(job.job_id)
+            while len(self._status) > _STATUS_HISTORY:
+                self._status.popitem(last=False)
+
+    def _requeue(self, job: _Job) -> None:
+        self._queue.put(job)
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            except Exception as exc:
+                self._set_status(job, "failed", 0, str(exc))
+                self._slots.release()
+
+    def _run(self, job: _Job) -> None:
+        job.attempts += 1
+        self._set_status(job, "sending")
+        # Items may be coalesced with other jobs (see AddFromPathsBatcher); the
+        # worker does not wait for the request and is free for the next job.
+        if job.blobs:
+            fut = submit_bytes_to_eagle(
+                job.host, job.blobs, job.tags, annotation=job.annotation, folder_id=job.folder_id
+            )
+        else:
+            fut = submit_to_eagle(job.host, job.paths, job.tags, annotation=job.annotation, folder_id=job.folder_id)
+        fut.add_done_callback(lambda f, job=job: self._finish(job, f))
+
+    def _finish(self, job: _Job, fut: Future) -> None:
+        try:
+            code, text = fut.result()
+            code = int(code or 0)
+        except Exception as exc:
+            code, text = 0, str(exc)
+        if 200 <= code < 300:
+            if job.dedupe:
+                _record_sent(job.host, job.dedupe)
+            self._set_status(job, "done", code, text)
+            self._slots.release()
+            return
+        if is_retryable(code) and job.attempts <= self._retries:
+            self._set_status(job, "retrying", code, text)
+            inc("send_retries")
+            delay = self._backoff * (2 ** (job.attempts - 1))
+            timer = threading.Timer(delay, self._requeue, args=(job,))
+            timer.daemon = True
+            timer.start()
+            return
+        outbox = get_outbox() if is_retryable(code) else None
+        if outbox is not None and outbox.add(
+            job.host, job.paths, job.tags, job.annotation, folder_id=job.folder_id, blobs=job.blobs,
+            dedupe=job.dedupe,
+        ):
+            # Eagle is unreachable: delivered later by the outbox flusher
+            self._set_status(job, "outboxed", code, text)
+        else:
+            self._set_status(job, "failed", code, text)
+        self._slots.release()
+
+
+_QUEUE: Optional[SendQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_send_queue() -> SendQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = SendQueue(
+                workers=get_send_workers(),
+                max_pending=get_send_queue_size(),
+                retries=get_send_retries(),
+                backoff=get_send_retry_backoff(),
+            )
+        return _QUEUE
+
+
+def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    q = _QUEUE
+    return q.get_job_status(job_id) if q is not None else None
@@ -0,0 +1,113 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import folder_paths
+
+# A lookup miss rebuilds the index at most this often; it catches files added
+# in sub-folders, whose creation does not change the top-level folder mtime.
+_MISS_REBUILD_SECONDS = 5.0
+
+
+def _basename_no_ext(name: str) -> str:
+    base = os.path.basename(name)
+    if "." in base:
+        base = ".".join(base.split(".")[:-1])
+    return base
+
+
+def _dir_signature(folder: str) -> Tuple[Tuple[str, int], ...]:
+    sig: List[Tuple[str, int]] = []
+    try:
+        dirs = folder_paths.get_folder_paths(folder)
+    except Exception:
+        dirs = []
+    for d in dirs:
+        try:
+            sig.append((d, os.stat(d).st_mtime_ns))
+        except Exception:
+            sig.append((d, -1))
+    return tuple(sig)
+
+
+class _FolderIndex:
+    __slots__ = ("signature", "built_at", "names", "full_paths")
+
+    def __init__(self, signature: Tuple[Tuple[str, int], ...], names: Dict[str, str]):
+        self.signature = signature
+        self.built_at = time.monotonic()
+        # lowercase basename without extension -> name relative to the folder
+        self.names = names
+        # lowercase basename -> resolved full path (filled on first lookup)
+        self.full_paths: Dict[str, str] = {}
+
+
+class BasenameIndex:
+    """Per-folder-type map of lowercase basename (no extension) to model file.
+
+    Built once from folder_paths.get_filename_list and rebuilt when the mtimes
+    of the folder's root directories change, when a cached path no longer
+    exists, or (rate limited) when a lookup misses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._folders: Dict[str, _FolderIndex] = {}
+
+    def _build(self, folder: str, signature: Tuple[Tuple[str, int], ...]) -> _FolderIndex:
+        names: Dict[str, str] = {}
+        try:
+            for n in folder_paths.get_filename_list(folder):
+                names.setdefault(_basename_no_ext(n).lower(), n)
+        except Exception:
+            pass
+        idx = _FolderIndex(signature, names)
+        with self._lock:
+            self._folders[folder] = idx
+        return idx
+
+    def _get(self, folder: str) -> _FolderIndex:
+        signature = _dir_signature(folder)
+        with self._lock:
+            idx = self._folders.get(folder)
+        if idx is None or idx.signature != signature:
+            idx = self._build(folder, signature)
+        return idx
+
+    def invalidate(self, folder: Optional[str] = None) -> None:
+        with self._lock:
+            if folder is None:
+                self._folders.clear()
+            else:
+                self._folders.pop(folder, None)
+
+    def resolve(self, folder: str, basename: str) -> Optional[str]:
+        key = (basename or "").lower()
+        if not key:
+            return None
+        idx = self._get(folder)
+        for attempt in range(2):
+            cached = idx.full_paths.get(key)
+            if cached and os.path.isfile(cached):
+                return cached
+            name = idx.names.get(key)
+            if name is not None:
+                full = folder_paths.get_full_path(folder, name)
+                if full:
+                    idx.full_paths[key] = full
+                    return full
+            if attempt == 0 and (cached or name is not None or time.monotonic() - idx.built_at >= _MISS_REBUILD_SECONDS):
+                # Stale entry or possibly a new file in a sub-folder
+                idx = self._build(folder, idx.signature)
+                continue
+            break
+        return None
+
+
+_INDEX = BasenameIndex()
+
+
+def get_basename_index() -> BasenameIndex:
+    return _INDEX
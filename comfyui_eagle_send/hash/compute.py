@@ -1,16 +1,30 @@
 from __future__ import annotations
 import hashlib
-import json
 import os
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
 
-import folder_paths
+from ..config import (
+    get_hash_cache_dir,
+    get_hash_mode,
+    get_hash_sidecars_enabled,
+    get_hash_workers,
+    get_hash_write_sidecars,
+)
+from ..lru import LRUCache
+from ..metrics import inc, observe
+from .basename_index import get_basename_index
+from .quick import autov1, fingerprint
+from .sidecar import read_sidecar, write_sidecar
+from .store import HashCacheStore
 
-# Minimal persistent cache for file hashes
+# Persistent cache for file hashes (SQLite, see hash/store.py)
 # Key: normalized absolute path (normcase(realpath(abspath(path))))
-# Val: [size:int, mtime_ns:int, sha256:str]
-_CACHE: Dict[str, list] = {}
-_CACHE_MTIME: float | None = None
+# Val: (size:int, mtime_ns:int, sha256:str)
+_STORE: Optional[HashCacheStore] = None
+_STORE_LOCK = threading.Lock()
 
 
 def _norm_abs_path(path: str) -> str:
@@ -21,178 +35,313 @@ def _norm_abs_path(path: str) -> str:
         return path
 
 
-def _cache_file_path() -> str:
-    # Store alongside the package root (comfyui_eagle_send/hash_cache.json)
-    root = os.path.dirname(os.path.dirname(__file__))
-    return os.path.join(root, "hash_cache.json")
-
-
-def _load_cache_if_changed() -> None:
-    global _CACHE, _CACHE_MTIME
+def _file_stat(file_path: str) -> Optional[Tuple[int, int]]:
+    # (size, mtime_ns), the cache validity key; None if the file cannot be stat'ed
     try:
-        p = _cache_file_path()
-        st = os.stat(p)
-        mtime = st.st_mtime
-        if _CACHE_MTIME is not None and _CACHE_MTIME == mtime:
-            return
-        with open(p, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                # ensure only expected structures are kept
-                new_cache: Dict[str, list] = {}
-                for k, v in data.items():
-                    if isinstance(k, str) and isinstance(v, list) and len(v) == 3:
-                        size, mtime_ns, sha = v
-                        if isinstance(size, int) and isinstance(mtime_ns, int) and isinstance(sha, str):
-                            new_cache[k] = [size, mtime_ns, sha]
-                _CACHE = new_cache
-            else:
-                _CACHE = {}
-        _CACHE_MTIME = mtime
-    except FileNotFoundError:
-        _CACHE = {}
-        _CACHE_MTIME = None
+        st = os.stat(file_path)
+        # Prefer nanosecond precision when available
+        return int(st.st_size), int(getattr(st, "st_mtime_ns", int(st.st_mtime * 1e9)))
     except Exception:
-        # On any error, fall back to empty cache
-        _CACHE = {}
-        _CACHE_MTIME = None
+        return None
 
 
-def _save_cache() -> None:
-    global _CACHE, _CACHE_MTIME
+def _cache_dir() -> str:
+    # Store alongside the package root (comfyui_eagle_send/) unless configured
+    return get_hash_cache_dir() or os.path.dirname(os.path.dirname(__file__))
+
+
+def _prune_store(store: HashCacheStore) -> None:
     try:
-        p = _cache_file_path()
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(_CACHE, f, ensure_ascii=False, separators=(",", ":"))
-        # Refresh observed mtime after write
-        try:
-            _CACHE_MTIME = os.stat(p).st_mtime
-        except Exception:
-            _CACHE_MTIME = None
+        store.prune_missing()
     except Exception:
-        # Ignore persistence failures to keep hashing functional
         pass
 
 
+def get_hash_store() -> HashCacheStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            root = _cache_dir()
+            _STORE = HashCacheStore(
+                os.path.join(root, "hash_cache.sqlite3"),
+                legacy_json_path=os.path.join(root, "hash_cache.json"),
+            )
+            # Drop entries for deleted/moved models without delaying the first hash
+            threading.Thread(target=_prune_store, args=(_STORE,), name="EagleHashPrune", daemon=True).start()
+        return _STORE
+
+
+# Read size for the fallback hashing loop (hashlib releases the GIL on large updates)
+_READ_CHUNK = 1024 * 1024
+
+# In-flight computations keyed like the cache, so concurrent callers asking for
+# the same file wait for one read instead of hashing it twice.
+_INFLIGHT: Dict[str, Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _hash_file(file_path: str) -> str:
+    with open(file_path, "rb", buffering=0) as f:
+        file_digest = getattr(hashlib, "file_digest", None)
+        if file_digest is not None:
+            # Python 3.11+: readinto() into a reused buffer, no per-chunk bytes objects
+            return file_digest(f, "sha256").hexdigest()
+        sha256_hash = hashlib.sha256()
+        buf = bytearray(_READ_CHUNK)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            sha256_hash.update(view[:n])
+        return sha256_hash.hexdigest()
+
+
+def _sidecar_sha256(file_path: str, key: str, size: int, mtime_ns: int) -> Optional[str]:
+    # A hash another tool already stored next to the model; copied into the cache
+    if not get_hash_sidecars_enabled():
+        return None
+    digest = read_sidecar(file_path, mtime_ns)
+    if digest:
+        inc("hash_sidecar_hits")
+        get_hash_store().put(key, size, mtime_ns, digest)
+    return digest
+
+
+def _maybe_write_sidecar(file_path: str, size: int, mtime_ns: int, digest: str) -> None:
+    # Only when the file did not change while it was being read
+    if get_hash_write_sidecars() and _file_stat(file_path) == (size, mtime_ns):
+        if write_sidecar(file_path, digest):
+            inc("hash_sidecars_written")
+
+
 def calculate_sha256(file_path: str) -> str:
-    # Try to use persistent+in-memory cache keyed by absolute normalized path
+    # Try to use the persistent cache keyed by absolute normalized path
     key = _norm_abs_path(file_path)
-    file_size: Optional[int] = None
-    file_mtime_ns: Optional[int] = None
-    try:
-        st = os.stat(file_path)
-        file_size = int(st.st_size)
-        # Prefer nanosecond precision when available
-        file_mtime_ns = int(getattr(st, "st_mtime_ns", int(st.st_mtime * 1e9)))
-    except Exception:
+    stat = _file_stat(file_path)
+    if stat is None:
         # If stat fails, skip cache and compute directly
-        pass
+        return _hash_file(file_path)
+    file_size, file_mtime_ns = stat
+
+    cached = get_hash_store().get(key, file_size, file_mtime_ns)
+    if cached:
+        inc("hash_cache_hits")
+        return cached
+    inc("hash_cache_misses")
+
+    # Cache miss: compute once even if several threads ask at the same time
+    with _INFLIGHT_LOCK:
+        fut = _INFLIGHT.get(key)
+        owner = fut is None
+        if owner:
+            fut = Future()
+            _INFLIGHT[key] = fut
+    if not owner:
+        return fut.result()
+    try:
+        digest = _sidecar_sha256(file_path, key, file_size, file_mtime_ns)
+        if digest is None:
+            t0 = time.perf_counter()
+            digest = _hash_file(file_path)
+            observe("hash_file", time.perf_counter() - t0)
+            inc("hash_bytes", file_size)
+            get_hash_store().put(key, file_size, file_mtime_ns, digest)
+            _maybe_write_sidecar(file_path, file_size, file_mtime_ns, digest)
+        fut.set_result(digest)
+        return digest
+    except BaseException as exc:
+        fut.set_exception(exc)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
 
-    if file_size is not None and file_mtime_ns is not None:
-        _load_cache_if_changed()
-        try:
-            entry = _CACHE.get(key)
-            if (
-                isinstance(entry, list)
-                and len(entry) == 3
-                and isinstance(entry[0], int)
-                and isinstance(entry[1], int)
-                and isinstance(entry[2], str)
-                and entry[0] == file_size
-                and entry[1] == file_mtime_ns
-            ):
-                return entry[2]
-        except Exception:
-            pass
 
-    # Cache miss or stat unavailable: compute hash
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    digest = sha256_hash.hexdigest()
+# Shared pool for cache misses; its threads (and their SQLite connections) are reused across calls
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
 
-    if file_size is not None and file_mtime_ns is not None:
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=max(1, get_hash_workers()), thread_name_prefix="EagleHash")
+        return _POOL
+
+
+def calculate_sha256_many(file_paths: List[str], max_workers: Optional[int] = None) -> Dict[str, str]:
+    """Hash several files concurrently; returns {path: sha256} for files that could be read."""
+    out: Dict[str, str] = {}
+    unique = list(dict.fromkeys(p for p in file_paths if p))
+    if not unique:
+        return out
+    # Cached hashes are looked up here; only misses go to the pool
+    misses: List[str] = []
+    store = get_hash_store()
+    for p in unique:
+        stat = _file_stat(p)
+        cached = store.get(_norm_abs_path(p), stat[0], stat[1]) if stat is not None else None
+        if cached:
+            inc("hash_cache_hits")
+            out[p] = cached
+        else:
+            misses.append(p)
+    workers = min(len(misses), max_workers or get_hash_workers())
+    if workers <= 1:
+        for p in misses:
+            try:
+                out[p] = calculate_sha256(p)
+            except Exception:
+                pass
+        return out
+    futures = {p: _get_pool().submit(calculate_sha256, p) for p in misses}
+    for p, fut in futures.items():
         try:
-            _CACHE[key] = [file_size, file_mtime_ns, digest]
-            _save_cache()
+            out[p] = fut.result()
         except Exception:
             pass
-    return digest
+    return out
 
 
 def short10(sha256_hex: str) -> str:
     return (sha256_hex or "")[:10]
 
 
-def _basename_no_ext(name: str) -> str:
-    base = os.path.basename(name)
-    if "." in base:
-        base = ".".join(base.split(".")[:-1])
-    return base
+def cached_sha256(file_path: str) -> Optional[str]:
+    """The full SHA-256 if it is cached (or in a sidecar) for the file's current size/mtime."""
+    stat = _file_stat(file_path)
+    if stat is None:
+        return None
+    key = _norm_abs_path(file_path)
+    return get_hash_store().get(key, stat[0], stat[1]) or _sidecar_sha256(file_path, key, stat[0], stat[1])
 
 
-def resolve_checkpoint_by_basename(model_basename: str) -> Optional[str]:
+# Quick identities by (path, size, mtime_ns, mode); they only stand in until the
+# background hash below has filled the persistent cache
+_QUICK_CACHE = LRUCache(1024)
+
+# Full hashes running in the background for files that got a quick identity
+_BACKGROUND: Optional[ThreadPoolExecutor] = None
+_BACKGROUND_KEYS: Set[str] = set()
+_BACKGROUND_LOCK = threading.Lock()
+
+
+def quick_hash(file_path: str, mode: str) -> str:
+    """AutoV1 (8 hex) or "fp:" + 16 hex of the header/sample fingerprint.
+
+    The prefix keeps a fingerprint from ever being read as a SHA-256 prefix.
+    """
+    stat = _file_stat(file_path)
+    key = (_norm_abs_path(file_path), stat, mode) if stat is not None else None
+    if key is not None:
+        cached = _QUICK_CACHE.get(key)
+        if cached is not None:
+            return cached
+    t0 = time.perf_counter()
+    digest = autov1(file_path) if mode == "autov1" else "fp:" + fingerprint(file_path)[:16]
+    observe("hash_quick", time.perf_counter() - t0)
+    if key is not None:
+        _QUICK_CACHE.put(key, digest)
+    return digest
+
+
+def _background_sha256(file_path: str, key: str) -> None:
     try:
-        names = folder_paths.get_filename_list("checkpoints")
-        target = None
-        b = model_basename.lower()
-        for n in names:
-            if _basename_no_ext(n).lower() == b:
-                target = n
-                break
-        if target:
-            return folder_paths.get_full_path("checkpoints", target)
+        calculate_sha256(file_path)
     except Exception:
         pass
-    return None
+    finally:
+        with _BACKGROUND_LOCK:
+            _BACKGROUND_KEYS.discard(key)
+
+
+def schedule_sha256(file_path: str) -> None:
+    """Compute and cache the full SHA-256 in the background (once per file)."""
+    global _BACKGROUND
+    key = _norm_abs_path(file_path)
+    with _BACKGROUND_LOCK:
+        if key in _BACKGROUND_KEYS:
+            return
+        _BACKGROUND_KEYS.add(key)
+        if _BACKGROUND is None:
+            # One file at a time: this only has to finish before the next render
+            _BACKGROUND = ThreadPoolExecutor(max_workers=1, thread_name_prefix="EagleHashBackground")
+        _BACKGROUND.submit(_background_sha256, file_path, key)
+
+
+def model_hashes_many(
+    file_paths: List[str], mode: Optional[str] = None, fingerprints: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """Short hashes for the A1111 metadata; returns {path: hash} for readable files.
+
+    In "full" mode (EAGLE_HASH_MODE) these are short10 of the SHA-256 (AutoV2),
+    computed now if needed. Otherwise a cached SHA-256 is still preferred, and
+    files without one are hashed in the background for later renders. Until
+    then "autov1" returns the AutoV1 hash, which readers recognise by its
+    length. "fingerprint" returns nothing for such files: a fingerprint is
+    not a hash any reader can look up. It is put into `fingerprints` when a
+    dict is passed.
+    """
+    mode = mode or get_hash_mode()
+    if mode == "full":
+        return {p: short10(d) for p, d in calculate_sha256_many(file_paths).items() if d}
+    out: Dict[str, str] = {}
+    for p in dict.fromkeys(p for p in file_paths if p):
+        try:
+            full = cached_sha256(p)
+            if full:
+                out[p] = short10(full)
+                continue
+            quick = quick_hash(p, mode)
+            inc("hash_quick_ids")
+            if mode == "autov1":
+                out[p] = quick
+            elif fingerprints is not None:
+                fingerprints[p] = quick
+        except Exception:
+            continue
+        schedule_sha256(p)
+    return out
+
+
+def resolve_checkpoint_by_basename(model_basename: str) -> Optional[str]:
+    try:
+        return get_basename_index().resolve("checkpoints", model_basename)
+    except Exception:
+        return None
 
 
 def resolve_unet_by_basename(model_basename: str) -> Optional[str]:
     try:
-        names = folder_paths.get_filename_list("diffusion_models")
-        b = model_basename.lower()
-        for n in names:
-            if _basename_no_ext(n).lower() == b:
-                return folder_paths.get_full_path("diffusion_models", n)
+        return get_basename_index().resolve("diffusion_models", model_basename)
     except Exception:
-        pass
-    return None
+        return None
 
 
 def resolve_clip_by_basename(clip_basename: str) -> Optional[str]:
     try:
-        names = folder_paths.get_filename_list("clip")
-        b = clip_basename.lower()
-        for n in names:
-            if _basename_no_ext(n).lower() == b:
-                return folder_paths.get_full_path("clip", n)
+        return get_basename_index().resolve("clip", clip_basename)
     except Exception:
-        pass
-    return None
+        return None
 
 
 def resolve_vae_by_basename(vae_basename: str) -> Optional[str]:
     try:
-        names = folder_paths.get_filename_list("vae")
-        b = vae_basename.lower()
-        for n in names:
-            if _basename_no_ext(n).lower() == b:
-                return folder_paths.get_full_path("vae", n)
+        return get_basename_index().resolve("vae", vae_basename)
     except Exception:
-        pass
-    return None
+        return None
 
 
 def resolve_loras_by_basenames(lora_basenames: list[str]) -> Dict[str, str]:
     out: Dict[str, str] = {}
-    try:
-        all_loras = folder_paths.get_filename_list("loras")
-        lower_map = { _basename_no_ext(n).lower(): n for n in all_loras }
-        for name in lora_basenames:
-            key = (name or "").lower()
-            if key in lower_map:
-                out[name] = folder_paths.get_full_path("loras", lower_map[key])
-    except Exception:
-        pass
+    index = get_basename_index()
+    for name in lora_basenames:
+        try:
+            full = index.resolve("loras", name)
+        except Exception:
+            full = None
+        if full:
+            out[name] = full
     return out
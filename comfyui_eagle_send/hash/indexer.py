@@ -0,0 +1,147 @@
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import folder_paths
+
+from ..config import get_prewarm_enabled, get_prewarm_settle_seconds
+from .compute import calculate_sha256
+
+# Folder types whose files can show up in the A1111 parameters string
+INDEXED_FOLDERS = ("checkpoints", "diffusion_models", "loras", "clip", "vae")
+
+# Pause between files so foreground hashing and disk I/O take precedence
+_YIELD_SECONDS = 0.05
+
+
+def _lower_thread_priority() -> None:
+    # On Linux each thread is its own task, so this only affects the indexer
+    if sys.platform.startswith("linux") and hasattr(os, "setpriority"):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except Exception:
+            pass
+
+
+class HashIndexer:
+    """Fills the hash cache for all model folders in a background thread.
+
+    Files are processed most recently modified first. Files modified within the
+    last `settle_seconds`, or whose size changes while being looked at, are
+    treated as still being written and skipped for this pass.
+    """
+
+    def __init__(self, folders: Tuple[str, ...] = INDEXED_FOLDERS, settle_seconds: float = 30.0):
+        self.folders = folders
+        self.settle_seconds = float(settle_seconds)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._progress: Dict[str, Any] = {
+            "state": "idle",
+            "total": 0,
+            "done": 0,
+            "skipped": 0,
+            "failed": 0,
+            "current": None,
+        }
+
+    def progress(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._progress)
+
+    def _update(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._progress.update(kwargs)
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._progress[key] = int(self._progress.get(key, 0)) + 1
+
+    def start(self) -> bool:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self._run, name="EagleHashIndexer", daemon=True)
+            self._thread.start()
+            return True
+
+    def _collect(self) -> List[Tuple[float, int, str]]:
+        files: Dict[str, Tuple[float, int]] = {}
+        for folder in self.folders:
+            try:
+                names = folder_paths.get_filename_list(folder)
+            except Exception:
+                continue
+            for name in names:
+                try:
+                    full = folder_paths.get_full_path(folder, name)
+                    if not full or full in files:
+                        continue
+                    st = os.stat(full)
+                    files[full] = (st.st_mtime, int(st.st_size))
+                except Exception:
+                    continue
+        entries = [(mtime, size, path) for path, (mtime, size) in files.items()]
+        entries.sort(key=lambda e: e[0], reverse=True)
+        return entries
+
+    def _run(self) -> None:
+        _lower_thread_priority()
+        self._update(state="scanning", total=0, done=0, skipped=0, failed=0, current=None)
+        entries = self._collect()
+        self._update(state="hashing", total=len(entries))
+        for mtime, size, path in entries:
+            self._update(current=path)
+            try:
+                st = os.stat(path)
+                if int(st.st_size) != size or time.time() - st.st_mtime < self.settle_seconds:
+                    self._bump("skipped")
+                    continue
+                calculate_sha256(path)
+                self._bump("done")
+            except Exception:
+                self._bump("failed")
+            time.sleep(_YIELD_SECONDS)
+        self._update(state="finished", current=None)
+
+
+_INDEXER: Optional[HashIndexer] = None
+_INDEXER_LOCK = threading.Lock()
+
+
+def get_indexer() -> HashIndexer:
+    global _INDEXER
+    with _INDEXER_LOCK:
+        if _INDEXER is None:
+            _INDEXER = HashIndexer(settle_seconds=get_prewarm_settle_seconds())
+        return _INDEXER
+
+
+def get_indexer_progress() -> Dict[str, Any]:
+    return get_indexer().progress()
+
+
+def _register_progress_route() -> None:
+    # Expose progress at GET /eagle_send/hash_index when running inside ComfyUI
+    try:
+        # server first: outside ComfyUI it fails before aiohttp is loaded
+        from server import PromptServer  # type: ignore
+        from aiohttp import web  # type: ignore
+
+        routes = PromptServer.instance.routes
+
+        @routes.get("/eagle_send/hash_index")
+        async def _hash_index_progress(request):  # noqa: ARG001
+            return web.json_response(get_indexer_progress())
+    except Exception:
+        pass
+
+
+def start_indexer_if_enabled() -> bool:
+    if not get_prewarm_enabled():
+        return False
+    _register_progress_route()
+    return get_indexer().start()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import hashlib
+import json
+import mmap
+import struct
+
+# Legacy A1111 "AutoV1" model hash: SHA-256 of 64 KiB read at offset 1 MiB
+_AUTOV1_OFFSET = 0x100000
+_AUTOV1_LENGTH = 0x10000
+
+# Fingerprint: the safetensors header plus this many evenly spaced data blocks
+_SAMPLE_COUNT = 8
+_SAMPLE_LENGTH = 0x10000
+# Larger headers are not safetensors (or are corrupt); sample the whole file instead
+_MAX_HEADER = 100 * 1024 * 1024
+
+
+def autov1(file_path: str) -> str:
+    """A1111's old 8-character model hash; reads 64 KiB regardless of file size."""
+    with open(file_path, "rb") as f:
+        f.seek(_AUTOV1_OFFSET)
+        return hashlib.sha256(f.read(_AUTOV1_LENGTH)).hexdigest()[:8]
+
+
+def _safetensors_header(mm) -> bytes:
+    # 8-byte little-endian length, then a JSON object; b"" when not safetensors
+    if len(mm) < 8:
+        return b""
+    (n,) = struct.unpack("<Q", mm[:8])
+    if n < 2 or n > _MAX_HEADER or 8 + n > len(mm):
+        return b""
+    header = mm[8:8 + n]
+    try:
+        if not isinstance(json.loads(header), dict):
+            return b""
+    except Exception:
+        return b""
+    return header
+
+
+def fingerprint(file_path: str) -> str:
+    """Hex identity from the file size, safetensors header and sampled data blocks.
+
+    Tensor names, shapes, dtypes and offsets come from the header, so two
+    different models practically never share one; the samples catch weights
+    that were modified in place. Reads well under a megabyte via mmap.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        h.update(struct.pack("<Q", size))
+        if size == 0:
+            return h.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header = _safetensors_header(mm)
+            h.update(header)
+            start = 8 + len(header) if header else 0
+            span = max(0, size - start - _SAMPLE_LENGTH)
+            for i in range(_SAMPLE_COUNT):
+                offset = start + (span * i) // max(1, _SAMPLE_COUNT - 1)
+                h.update(mm[offset:offset + _SAMPLE_LENGTH])
+    return h.hexdigest()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import json
+import os
+import re
+from typing import Any, List, Optional
+
+_SHA256_RE = re.compile(r"(?<![0-9a-fA-F])([0-9a-fA-F]{64})(?![0-9a-fA-F])")
+
+# Sidecars are only trusted when written after the model was last modified;
+# the slack covers filesystems with coarse timestamps (FAT: 2 s)
+_MTIME_SLACK_NS = 2_000_000_000
+# Companion JSON files are small; anything bigger is not one of them
+_MAX_JSON_BYTES = 4 * 1024 * 1024
+
+
+def sidecar_path(file_path: str) -> str:
+    """Where write_sidecar puts the hash: `<model file>.sha256` (sha256sum format)."""
+    return file_path + ".sha256"
+
+
+def _candidates(file_path: str) -> List[str]:
+    stem = os.path.splitext(file_path)[0]
+    # Plain hash files first, then model-manager metadata (Civitai Helper, LoRA Manager)
+    return [sidecar_path(file_path), stem + ".sha256", stem + ".civitai.info", stem + ".metadata.json"]
+
+
+def _sha_in(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        m = _SHA256_RE.fullmatch(value.strip())
+        return m.group(1).lower() if m else None
+    return None
+
+
+def _sha_from_mapping(data: Any) -> Optional[str]:
+    # {"sha256": ...} or {"hashes": {"SHA256": ...}}, keys in any case
+    if not isinstance(data, dict):
+        return None
+    for k, v in data.items():
+        if isinstance(k, str) and k.lower() == "sha256" and _sha_in(v):
+            return _sha_in(v)
+    hashes = data.get("hashes")
+    return _sha_from_mapping(hashes) if isinstance(hashes, dict) else None
+
+
+def _sha_from_json(data: Any, file_name: str) -> Optional[str]:
+    found = _sha_from_mapping(data)
+    if found or not isinstance(data, dict):
+        return found
+    # Civitai model-version JSON: pick the entry for this file, else the primary one
+    files = [f for f in data.get("files") or [] if isinstance(f, dict)]
+    for pick in (
+        lambda f: f.get("name") == file_name,
+        lambda f: f.get("primary") is True,
+        lambda f: len(files) == 1,
+    ):
+        for f in files:
+            if pick(f) and _sha_from_mapping(f):
+                return _sha_from_mapping(f)
+    return None
+
+
+def _read(path: str, file_name: str) -> Optional[str]:
+    with open(path, "rb") as f:
+        raw = f.read(_MAX_JSON_BYTES + 1)
+    if path.endswith(".sha256"):
+        # "<hex>  name", "<hex> *name", "SHA256 (name) = <hex>" or just "<hex>"
+        m = _SHA256_RE.search(raw[:4096].decode("utf-8", "replace"))
+        return m.group(1).lower() if m else None
+    if len(raw) > _MAX_JSON_BYTES:
+        return None
+    return _sha_from_json(json.loads(raw.decode("utf-8-sig")), file_name)
+
+
+def read_sidecar(file_path: str, mtime_ns: int) -> Optional[str]:
+    """SHA-256 recorded next to the model, or None.
+
+    Files older than the model itself are ignored: they describe an earlier
+    version of it.
+    """
+    file_name = os.path.basename(file_path)
+    for path in _candidates(file_path):
+        try:
+            st = os.stat(path)
+            if int(st.st_mtime_ns) + _MTIME_SLACK_NS < mtime_ns:
+                continue
+            digest = _read(path, file_name)
+        except Exception:
+            continue
+        if digest:
+            return digest
+    return None
+
+
+def write_sidecar(file_path: str, sha256: str) -> bool:
+    """Write `<model file>.sha256` atomically; False if the folder is read-only."""
+    path = sidecar_path(file_path)
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            f.write(f"{sha256} *{os.path.basename(file_path)}\n")
+        os.replace(tmp, path)
+        return True
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+        return False
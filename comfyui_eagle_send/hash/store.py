@@ -0,0 +1,191 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import threading
+from typing import Iterable, Optional, Tuple
+
+try:
+    import sqlite3  # type: ignore
+except Exception:  # pragma: no cover
+    sqlite3 = None  # type: ignore
+
+from ..metrics import inc
+
+_log = logging.getLogger(__name__)
+
+# Milliseconds a connection waits for another writer (the prewarm thread,
+# another ComfyUI process) before an operation fails with "database is locked"
+BUSY_TIMEOUT_MS = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+)
+"""
+
+
+def is_busy_error(exc: Exception) -> bool:
+    # SQLITE_BUSY / SQLITE_LOCKED: transient, another connection holds the lock
+    if sqlite3 is None or not isinstance(exc, sqlite3.OperationalError):
+        return False
+    msg = str(exc).lower()
+    return "locked" in msg or "busy" in msg
+
+
+class HashCacheStore:
+    """Persistent file-hash cache backed by SQLite in WAL mode.
+
+    Rows are keyed by normalized absolute path and hold (size, mtime_ns, sha256).
+    Writes are single-row upserts, so several ComfyUI processes can share the
+    same database file. Each thread uses its own connection.
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._disabled = sqlite3 is None
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+        try:
+            # First, so switching to WAL also waits out a busy database
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except Exception:
+            conn.close()
+            raise
+        self._local.conn = conn
+        return conn
+
+    def _conn(self):
+        if self._disabled:
+            return None
+        try:
+            conn = self._connect()
+            if not self._initialized:
+                with self._init_lock:
+                    if not self._initialized:
+                        conn.execute(_SCHEMA)
+                        self._migrate_legacy_json(conn)
+                        self._initialized = True
+            return conn
+        except Exception as exc:
+            if is_busy_error(exc):
+                # Still locked after the busy timeout: skip the cache for this
+                # call only; the next one connects (or initializes) again
+                inc("hash_store_busy")
+                return None
+            # Unwritable location or broken sqlite: hashing keeps working uncached
+            self._disabled = True
+            inc("hash_store_disabled")
+            _log.warning("Eagle Send: hash cache %s unavailable (%s); hashing without it", self.db_path, exc)
+            return None
+
+    def _migrate_legacy_json(self, conn) -> None:
+        p = self.legacy_json_path
+        if not p or not os.path.isfile(p):
+            return
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        rows = []
+        if isinstance(data, dict):
+            for k, v in data.items():
+                if isinstance(k, str) and isinstance(v, list) and len(v) == 3:
+                    size, mtime_ns, sha = v
+                    if isinstance(size, int) and isinstance(mtime_ns, int) and isinstance(sha, str):
+                        rows.append((k, size, mtime_ns, sha))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Existing rows win: another process may already hold newer hashes
+            conn.executemany(
+                "INSERT OR IGNORE INTO file_hashes (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            return
+        try:
+            os.replace(p, p + ".migrated")
+        except Exception:
+            pass
+
+    def get(self, key: str, size: int, mtime_ns: int) -> Optional[str]:
+        conn = self._conn()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT size, mtime_ns, sha256 FROM file_hashes WHERE path = ?", (key,)
+            ).fetchone()
+        except Exception:
+            return None
+        if row and row[0] == size and row[1] == mtime_ns and isinstance(row[2], str):
+            return row[2]
+        return None
+
+    def put(self, key: str, size: int, mtime_ns: int, sha256: str) -> None:
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT INTO file_hashes (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "sha256 = excluded.sha256",
+                (key, size, mtime_ns, sha256),
+            )
+        except Exception:
+            pass
+
+    def items(self) -> Iterable[Tuple[str, int, int, str]]:
+        conn = self._conn()
+        if conn is None:
+            return []
+        try:
+            return conn.execute("SELECT path, size, mtime_ns, sha256 FROM file_hashes").fetchall()
+        except Exception:
+            return []
+
+    def prune_missing(self) -> int:
+        """Delete rows whose files no longer exist; returns the number removed."""
+        conn = self._conn()
+        if conn is None:
+            return 0
+        try:
+            paths = [r[0] for r in conn.execute("SELECT path FROM file_hashes").fetchall()]
+        except Exception:
+            return 0
+        # Only drop files whose folder is still there, so an unmounted model
+        # drive does not wipe its cached hashes.
+        missing = [
+            (p,) for p in paths
+            if not os.path.exists(p) and os.path.isdir(os.path.dirname(p))
+        ]
+        if not missing:
+            return 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM file_hashes WHERE path = ?", missing)
+            conn.execute("COMMIT")
+        except Exception:
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            return 0
+        return len(missing)
+
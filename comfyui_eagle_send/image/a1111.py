@@ -16,6 +16,7 @@ def build_parameters(
     sampler_name: str | None = None,
     scheduler: str | None = None,
     clip_skip: int | None = None,
+    model_fingerprint: str | None = None,
 ) -> str:
     pos = (positive or "").strip()
     line1 = pos
@@ -40,6 +41,9 @@ def build_parameters(
         segs.append(f"Clip skip: {abs(clip_skip)}")
     if model_hash10:
         segs.append(f"Model hash: {model_hash10}")
+    elif model_fingerprint:
+        # Own key: not a hash readers could look up (EAGLE_HASH_MODE=fingerprint)
+        segs.append(f"Model fingerprint: {model_fingerprint}")
     if model_basename:
         segs.append(f"Model: {model_basename}")
     segs.append("Version: ComfyUI")
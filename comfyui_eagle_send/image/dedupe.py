@@ -0,0 +1,164 @@
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import sqlite3  # type: ignore
+except Exception:  # pragma: no cover
+    sqlite3 = None  # type: ignore
+
+from ..config import get_dedupe_max_entries, get_hash_cache_dir
+from ..hash.store import BUSY_TIMEOUT_MS, is_busy_error
+
+_log = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sent_images (
+        digest TEXT NOT NULL,
+        host TEXT NOT NULL,
+        name TEXT NOT NULL,
+        created REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        item_id TEXT,
+        PRIMARY KEY (digest, host)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS sent_images_last_seen ON sent_images (last_seen)",
+)
+
+
+class SentImageIndex:
+    """Persistent digest -> Eagle item name index of images already sent.
+
+    Rows are keyed by (frame digest, host). The Eagle item id is filled in
+    once the item has been looked up, since imports do not return it. Lookups refresh `last_seen`, and
+    after each write the table is trimmed to `max_entries` rows, dropping the
+    least recently seen first. SQLite in WAL mode with one connection per
+    thread, like the hash cache.
+    """
+
+    def __init__(self, db_path: str, max_entries: int):
+        self.db_path = db_path
+        self.max_entries = max(1, int(max_entries))
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._disabled = sqlite3 is None
+
+    def _conn(self):
+        if self._disabled:
+            return None
+        try:
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+                try:
+                    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                except Exception:
+                    conn.close()
+                    raise
+                self._local.conn = conn
+            if not self._initialized:
+                with self._init_lock:
+                    if not self._initialized:
+                        for stmt in _SCHEMA:
+                            conn.execute(stmt)
+                        columns = {row[1] for row in conn.execute("PRAGMA table_info(sent_images)")}
+                        if "item_id" not in columns:
+                            # Databases created before item ids were stored
+                            conn.execute("ALTER TABLE sent_images ADD COLUMN item_id TEXT")
+                        self._initialized = True
+            return conn
+        except Exception as exc:
+            if is_busy_error(exc):
+                # Locked by another writer: skip this call, retry on the next
+                return None
+            # Duplicate detection is best effort; sends work without it
+            self._disabled = True
+            _log.warning(
+                "Eagle Send: sent-image index %s unavailable (%s); duplicates are not detected", self.db_path, exc
+            )
+            return None
+
+    def lookup(self, host: str, digests: List[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        """{digest: (item name, item id or None)} for the digests already sent to `host`."""
+        conn = self._conn()
+        unique = list(dict.fromkeys(d for d in digests if d))
+        if conn is None or not unique:
+            return {}
+        found: Dict[str, Tuple[str, Optional[str]]] = {}
+        try:
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT digest, name, item_id FROM sent_images WHERE host = ? AND digest IN ({marks})",
+                    [host] + chunk,
+                ).fetchall()
+                found.update((d, (n, i)) for d, n, i in rows)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE sent_images SET last_seen = ? WHERE digest = ? AND host = ?",
+                    [(now, d, host) for d in found],
+                )
+        except Exception:
+            return found
+        return found
+
+    def record(self, host: str, entries: List[Tuple[str, str]]) -> None:
+        """Remember (digest, item name) pairs as sent to `host`."""
+        conn = self._conn()
+        if conn is None or not entries:
+            return
+        now = time.time()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO sent_images (digest, host, name, created, last_seen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(digest, host) DO UPDATE SET name = excluded.name, last_seen = excluded.last_seen, "
+                "item_id = NULL",
+                [(d, host, n, now, now) for d, n in entries if d],
+            )
+            conn.execute(
+                "DELETE FROM sent_images WHERE rowid IN "
+                "(SELECT rowid FROM sent_images ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+
+    def set_item_id(self, host: str, digest: str, item_id: str) -> None:
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "UPDATE sent_images SET item_id = ? WHERE digest = ? AND host = ?", (item_id, digest, host)
+            )
+        except Exception:
+            pass
+
+
+_INDEX: Optional[SentImageIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_sent_index() -> SentImageIndex:
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            # Same folder as the hash cache (package folder unless EAGLE_HASH_CACHE_DIR)
+            root = get_hash_cache_dir() or os.path.dirname(os.path.dirname(__file__))
+            _INDEX = SentImageIndex(os.path.join(root, "sent_images.sqlite3"), get_dedupe_max_entries())
+        return _INDEX
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+# Output formats offered by the node and the file extension each one uses.
+# Kept free of imports so the node can list them without loading Pillow.
+IMAGE_FORMATS = ("png", "webp", "webp_lossless", "jpeg", "avif")
+EXTENSIONS = {"png": "png", "webp": "webp", "webp_lossless": "webp", "jpeg": "jpg", "avif": "avif"}
+MIME_TYPES = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "webp_lossless": "image/webp",
+    "jpeg": "image/jpeg",
+    "avif": "image/avif",
+}
+
+# What the node does with a frame that was already sent to the same Eagle host.
+# Listed here rather than in image/dedupe.py so INPUT_TYPES does not load sqlite3.
+DUPLICATE_POLICIES = ("send", "skip", "tag_only")
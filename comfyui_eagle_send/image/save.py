@@ -1,11 +1,22 @@
 from __future__ import annotations
+import hashlib
+import io
 import os
 import json
-from typing import Any, Dict, List
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Tuple
 from datetime import datetime
 
 import folder_paths  # ComfyUI helper
 
+from ..config import get_png_compress_metadata, get_save_workers, get_workflow_cache_size
+from ..lru import LRUCache
+from ..metrics import inc
+from .formats import IMAGE_FORMATS, EXTENSIONS as _EXTENSIONS, MIME_TYPES as _MIME_TYPES  # noqa: F401
+
 
 def _apply_datetime_token(prefix: str) -> str:
     """Replace a single supported datetime token with yyyymmdd_HHmmss.
@@ -17,25 +28,56 @@ def _apply_datetime_token(prefix: str) -> str:
     return prefix.replace("%datetime%", ts)
 
 
-def save_images_output(
-    pil_images: List[Any],
-    filename_prefix: str,
+# Text shorter than this stays in a plain tEXt chunk even when compression is on
+_COMPRESS_MIN_CHARS = 1024
+
+# JSON text of extra_pnginfo values by (key, id(value)). ComfyUI passes the same
+# objects to every call of one prompt (list inputs, several Eagle nodes) and does
+# not modify them, so PNG and EXIF metadata reuse one serialization per batch.
+# The value is kept in the entry, so a reused id never matches another object.
+_JSON_CACHE = LRUCache(16)
+
+
+def _json_text(key: str, val: Any) -> str:
+    if not isinstance(val, (dict, list)):
+        return json.dumps(val)
+    cache_key = (key, id(val))
+    hit = _JSON_CACHE.get(cache_key)
+    if hit is not None and hit[0] is val:
+        inc("metadata_json_cache_hits")
+        return hit[1]
+    text = json.dumps(val)
+    _JSON_CACHE.put(cache_key, (val, text))
+    return text
+
+
+# Compressed chunks by (key, digest of the text): queued runs of one workflow
+# reuse the bytes instead of compressing them again. Hashing the text costs a
+# fraction of zlib, so the cache is only used when compression is on.
+_COMPRESSED_CACHE = LRUCache(get_workflow_cache_size())
+
+
+def _compressed_text_chunk(key: str, text: str) -> Tuple[bytes, bytes]:
+    """(chunk type, chunk data) for an iTXt entry with the zlib flag set.
+
+    iTXt carries UTF-8 and is what Pillow writes for compressed text; Pillow,
+    exiftool and A1111-style readers decode it.
+    """
+    raw = text.encode("utf-8")
+    cache_key = (key, hashlib.blake2b(raw, digest_size=16).digest())
+    cached = _COMPRESSED_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    chunk = (b"iTXt", key.encode("latin-1") + b"\0\x01\0\0\0" + zlib.compress(raw))
+    _COMPRESSED_CACHE.put(cache_key, chunk)
+    return chunk
+
+
+def _build_pnginfo(
     prompt: str | None,
     extra_pnginfo: Dict[str, Any] | None,
-    a1111_params: str | None = None,
-) -> List[str]:
-    paths: List[str] = []
-    if not pil_images:
-        return paths
-    output_dir = folder_paths.get_output_directory()
-    # Expand our minimal datetime token before delegating to ComfyUI's naming
-    filename_prefix = _apply_datetime_token(str(filename_prefix or ""))
-    width, height = pil_images[0].size
-    full_output_folder, filename, counter, subfolder, filename_prefix = folder_paths.get_save_image_path(
-        filename_prefix, output_dir, width, height
-    )
-
-    pnginfo = None
+    a1111_params: str | None,
+):
     try:
         from PIL.PngImagePlugin import PngInfo  # type: ignore
 
@@ -45,9 +87,14 @@ def save_images_output(
         if params_text:
             pnginfo.add_text("parameters", params_text)
         if isinstance(extra_pnginfo, dict):
+            compress = get_png_compress_metadata()
             for key, val in extra_pnginfo.items():
                 try:
-                    pnginfo.add_text(key, json.dumps(val))
+                    text = _json_text(key, val)
+                    if compress and len(text) >= _COMPRESS_MIN_CHARS:
+                        pnginfo.add(*_compressed_text_chunk(key, text))
+                    else:
+                        pnginfo.add_text(key, text)
                 except Exception:
                     pass
         # Also keep original prompt JSON for tools that read it
@@ -56,22 +103,359 @@ def save_images_output(
                 pnginfo.add_text("prompt", json.dumps(prompt))
         except Exception:
             pass
+        return pnginfo
+    except Exception:
+        return None
+
+
+# EXIF tags (Pillow does not export names for these)
+_EXIF_IFD = 0x8769
+_USER_COMMENT = 0x9286
+_MAKE = 0x010F
+# JPEG stores EXIF in one APP1 segment, which cannot exceed 64 KiB
+_JPEG_EXIF_LIMIT = 65533
+
+
+def _user_comment(text: str) -> bytes:
+    # EXIF UserComment with the "UNICODE" charset, as written by A1111 (piexif)
+    return b"UNICODE\x00" + text.encode("utf-16-be")
+
+
+def _build_exif(
+    prompt: str | None,
+    extra_pnginfo: Dict[str, Any] | None,
+    a1111_params: str | None,
+    limit: int | None = None,
+) -> bytes | None:
+    """EXIF block carrying the same metadata as the PNG text chunks.
+
+    `parameters` goes to UserComment (read by A1111, Civitai and most prompt
+    readers). extra_pnginfo entries use ComfyUI's own WebP convention of
+    "key:json" strings in descending tags starting at Make (0x010F). When the
+    result would exceed `limit`, only UserComment is kept, truncated if it
+    still does not fit.
+    """
+    try:
+        from PIL import Image  # type: ignore
+    except Exception:
+        return None
+    params_text = a1111_params if (isinstance(a1111_params, str) and a1111_params.strip()) else (prompt or "")
+
+    def _dump(with_extra: bool, text: str) -> bytes:
+        exif = Image.Exif()
+        if text:
+            exif.get_ifd(_EXIF_IFD)[_USER_COMMENT] = _user_comment(text)
+        if with_extra and isinstance(extra_pnginfo, dict):
+            tag = _MAKE
+            for key, val in extra_pnginfo.items():
+                try:
+                    exif[tag] = f"{key}:{_json_text(key, val)}"
+                    tag -= 1
+                except Exception:
+                    pass
+        return exif.tobytes()
+
+    try:
+        data = _dump(True, params_text)
+        if limit is not None and len(data) > limit:
+            data = _dump(False, params_text)
+            text = params_text
+            while len(data) > limit and text:
+                # UTF-16: at least 2 bytes per character dropped
+                text = text[:max(0, len(text) - (len(data) - limit + 1) // 2 - 1)]
+                data = _dump(False, text)
+        return data
+    except Exception:
+        return None
+
+
+def _ensure_avif() -> None:
+    try:
+        from PIL import features  # type: ignore
+
+        if features.check("avif"):
+            return
     except Exception:
-        pnginfo = None
+        pass
+    try:
+        import pillow_avif  # type: ignore  # noqa: F401  (registers the AVIF plugin)
+    except Exception:
+        raise RuntimeError("AVIF output requires Pillow >= 11.2 with AVIF support or the pillow-avif-plugin package")
+
 
+def _encode_kwargs(
+    image_format: str,
+    prompt: str | None,
+    extra_pnginfo: Dict[str, Any] | None,
+    a1111_params: str | None,
+    compress_level: int,
+    optimize: bool,
+    quality: int,
+) -> Dict[str, Any]:
+    """Pillow save() arguments for one batch; metadata is built once and shared by all frames."""
+    q = min(100, max(1, int(quality)))
+    if image_format == "png":
+        kwargs: Dict[str, Any] = {"format": "PNG", "compress_level": min(9, max(0, int(compress_level)))}
+        if optimize:
+            kwargs["optimize"] = True
+        pnginfo = _build_pnginfo(prompt, extra_pnginfo, a1111_params)
+        if pnginfo is not None:
+            kwargs["pnginfo"] = pnginfo
+        return kwargs
+    if image_format == "webp":
+        kwargs = {"format": "WEBP", "quality": q, "method": 6 if optimize else 4}
+    elif image_format == "webp_lossless":
+        kwargs = {"format": "WEBP", "lossless": True, "quality": q, "method": 6 if optimize else 4}
+    elif image_format == "jpeg":
+        kwargs = {"format": "JPEG", "quality": q, "optimize": bool(optimize)}
+    elif image_format == "avif":
+        _ensure_avif()
+        kwargs = {"format": "AVIF", "quality": q}
+    else:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    exif = _build_exif(
+        prompt, extra_pnginfo, a1111_params, limit=_JPEG_EXIF_LIMIT if image_format == "jpeg" else None
+    )
+    if exif:
+        kwargs["exif"] = exif
+    return kwargs
+
+
+def _frame_file_names(filename: str, counter: int, count: int, ext: str = "png") -> List[str]:
+    names: List[str] = []
     has_batch_token = "%batch_num%" in filename
-    for batch_number, pil_image in enumerate(pil_images):
+    for batch_number in range(count):
         if has_batch_token:
             filename_with_batch_num = filename.replace("%batch_num%", str(batch_number))
             cur_counter = counter
         else:
             filename_with_batch_num = filename
             cur_counter = counter + batch_number
-        file_name = f"{filename_with_batch_num}_{cur_counter:05}_.png"
-        save_path = os.path.join(full_output_folder, file_name)
-        if pnginfo is not None:
-            pil_image.save(save_path, format="PNG", pnginfo=pnginfo)
-        else:
-            pil_image.save(save_path, format="PNG")
-        paths.append(save_path)
+        names.append(f"{filename_with_batch_num}_{cur_counter:05}_.{ext}")
+    return names
+
+
+def save_frame(pil_image: Any, save_path: Any, kwargs: Dict[str, Any]) -> Any:
+    """Encode one frame to `save_path` (a file path or a writable binary stream)."""
+    if kwargs.get("format") == "JPEG" and pil_image.mode not in ("RGB", "L"):
+        # JPEG has no alpha channel
+        pil_image = pil_image.convert("RGB")
+    pil_image.save(save_path, **kwargs)
+    if isinstance(save_path, str):
+        try:
+            inc("bytes_written", os.path.getsize(save_path))
+        except Exception:
+            pass
+    return save_path
+
+
+def encode_frame(pil_image: Any, kwargs: Dict[str, Any]) -> bytes:
+    buf = io.BytesIO()
+    save_frame(pil_image, buf, kwargs)
+    data = buf.getvalue()
+    inc("bytes_encoded", len(data))
+    return data
+
+
+_POOL: ThreadPoolExecutor | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    # Pillow releases the GIL while zlib compresses, so frames encode in parallel
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=get_save_workers(), thread_name_prefix="EagleSave")
+        return _POOL
+
+
+def plan_output(
+    filename_prefix: str,
+    width: int,
+    height: int,
+    count: int,
+    prompt: str | None,
+    extra_pnginfo: Dict[str, Any] | None,
+    a1111_params: str | None = None,
+    compress_level: int = 6,
+    optimize: bool = False,
+    image_format: str = "png",
+    quality: int = 90,
+) -> Tuple[List[str], Dict[str, Any]]:
+    """Reserve output file names for `count` frames and build the shared save() arguments."""
+    output_dir = folder_paths.get_output_directory()
+    # Expand our minimal datetime token before delegating to ComfyUI's naming
+    filename_prefix = _apply_datetime_token(str(filename_prefix or ""))
+    full_output_folder, filename, counter, subfolder, filename_prefix = folder_paths.get_save_image_path(
+        filename_prefix, output_dir, width, height
+    )
+
+    image_format = (image_format or "png").lower()
+    kwargs = _encode_kwargs(image_format, prompt, extra_pnginfo, a1111_params, compress_level, optimize, quality)
+    save_paths = [
+        os.path.join(full_output_folder, file_name)
+        for file_name in _frame_file_names(filename, counter, count, _EXTENSIONS[image_format])
+    ]
+    return save_paths, kwargs
+
+
+# Frames encoded in memory never reach the output folder, so ComfyUI's counter
+# cannot number them; this process-wide counter plus a start timestamp does
+_MEMORY_COUNTER = 0
+_MEMORY_COUNTER_LOCK = threading.Lock()
+_MEMORY_STAMP = datetime.now().strftime("%Y%m%d%H%M%S")
+
+
+def _reserve_memory_counter(count: int) -> int:
+    global _MEMORY_COUNTER
+    with _MEMORY_COUNTER_LOCK:
+        first = _MEMORY_COUNTER + 1
+        _MEMORY_COUNTER += max(1, count)
+        return first
+
+
+def plan_memory_output(
+    filename_prefix: str,
+    count: int,
+    prompt: str | None,
+    extra_pnginfo: Dict[str, Any] | None,
+    a1111_params: str | None = None,
+    compress_level: int = 6,
+    optimize: bool = False,
+    image_format: str = "png",
+    quality: int = 90,
+) -> Tuple[List[str], Dict[str, Any], str]:
+    """Item names, shared save() arguments and MIME type for frames encoded in memory.
+
+    Names are unique per process run (`<prefix>_<start time>_<counter>_`), so
+    repeated runs never produce Eagle items with the same name.
+    """
+    filename = os.path.basename(_apply_datetime_token(str(filename_prefix or ""))) or "ComfyUI"
+    image_format = (image_format or "png").lower()
+    kwargs = _encode_kwargs(image_format, prompt, extra_pnginfo, a1111_params, compress_level, optimize, quality)
+    counter = _reserve_memory_counter(1 if "%batch_num%" in filename else count)
+    names = [
+        os.path.splitext(n)[0]
+        for n in _frame_file_names(f"{filename}_{_MEMORY_STAMP}", counter, count, _EXTENSIONS[image_format])
+    ]
+    return names, kwargs, _MIME_TYPES[image_format]
+
+
+def encode_images(pil_images: List[Any], kwargs: Dict[str, Any]) -> List[bytes]:
+    """Encode a batch in memory on the save pool, keeping batch order."""
+    if len(pil_images) <= 1:
+        return [encode_frame(im, kwargs) for im in pil_images]
+    pool = _get_pool()
+    futures = [pool.submit(encode_frame, im, kwargs) for im in pil_images]
+    return [fut.result() for fut in futures]
+
+
+def save_images_output(
+    pil_images: List[Any],
+    filename_prefix: str,
+    prompt: str | None,
+    extra_pnginfo: Dict[str, Any] | None,
+    a1111_params: str | None = None,
+    compress_level: int = 6,
+    optimize: bool = False,
+    image_format: str = "png",
+    quality: int = 90,
+) -> List[str]:
+    paths: List[str] = []
+    if not pil_images:
+        return paths
+    width, height = pil_images[0].size
+    save_paths, kwargs = plan_output(
+        filename_prefix, width, height, len(pil_images), prompt, extra_pnginfo,
+        a1111_params=a1111_params, compress_level=compress_level, optimize=optimize,
+        image_format=image_format, quality=quality,
+    )
+    if len(pil_images) == 1:
+        return [save_frame(pil_images[0], save_paths[0], kwargs)]
+    pool = _get_pool()
+    futures = [
+        pool.submit(save_frame, pil_image, save_path, kwargs)
+        for pil_image, save_path in zip(pil_images, save_paths)
+    ]
+    # Keep batch order; re-raise the first encoding error like the serial loop did
+    for fut in futures:
+        paths.append(fut.result())
     return paths
+
+
+def _stream_through_pool(
+    frames: Iterable[Any],
+    task: Callable[[int, Any], Any],
+    on_done: Callable[[Any], None] | None,
+    max_in_flight: int | None,
+) -> int:
+    # Results are handed to on_done in order and not kept, so memory stays flat
+    limit = max(1, int(max_in_flight or get_save_workers()))
+    pool = _get_pool()
+    window: Deque[Future] = deque()
+    done = 0
+
+    def _complete_oldest() -> None:
+        nonlocal done
+        result = window.popleft().result()
+        done += 1
+        if on_done is not None:
+            on_done(result)
+
+    for index, pil_image in enumerate(frames):
+        window.append(pool.submit(task, index, pil_image))
+        del pil_image
+        if len(window) >= limit:
+            _complete_oldest()
+    while window:
+        _complete_oldest()
+    return done
+
+
+def save_frames_streaming(
+    frames: Iterable[Any],
+    save_paths: List[str],
+    kwargs: Dict[str, Any],
+    on_saved: Callable[[str], None] | None = None,
+    max_in_flight: int | None = None,
+) -> List[str]:
+    """Encode frames as they are produced, calling on_saved(path) in batch order.
+
+    At most `max_in_flight` frames are being encoded at once, so frames pulled
+    from the iterator are released soon after they are written and memory does
+    not grow with the batch size. The iterator runs in the calling thread, which
+    overlaps producing frame N+1 with encoding frame N.
+    """
+    paths: List[str] = []
+
+    def _saved(path: str) -> None:
+        paths.append(path)
+        if on_saved is not None:
+            on_saved(path)
+
+    _stream_through_pool(
+        frames,
+        lambda index, pil_image: save_frame(pil_image, save_paths[index], kwargs),
+        _saved,
+        max_in_flight,
+    )
+    return paths
+
+
+def encode_frames_streaming(
+    frames: Iterable[Any],
+    kwargs: Dict[str, Any],
+    on_encoded: Callable[[bytes], None] | None = None,
+    max_in_flight: int | None = None,
+) -> int:
+    """In-memory counterpart of save_frames_streaming; on_encoded receives the encoded bytes.
+
+    Returns the number of frames encoded.
+    """
+    return _stream_through_pool(
+        frames,
+        lambda index, pil_image: encode_frame(pil_image, kwargs),
+        on_encoded,
+        max_in_flight,
+    )
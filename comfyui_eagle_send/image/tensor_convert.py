@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Any, List
+import hashlib
+from typing import Any, Iterator, List, Optional, Tuple
 
 try:
     import torch  # type: ignore
@@ -19,32 +20,103 @@ def ensure_deps():
         raise RuntimeError("PIL (Pillow) not available; install pillow")
 
 
-def tensor_to_pil_list(images_tensor) -> List[Any]:
-    ensure_deps()
-    pil_images: List[Any] = []
-    if images_tensor is None:
-        return pil_images
+def _frame_scratch(tensor):
+    # Float buffer for one frame, shared by the frames of a single conversion and
+    # released with it (it lives on the tensor's device, possibly in VRAM)
+    if tensor.dtype == torch.uint8:
+        return None
+    return torch.empty(tuple(tensor.shape[1:]), dtype=tensor.dtype, device=tensor.device)
+
+
+def _as_batch(images_tensor):
     if not isinstance(images_tensor, torch.Tensor):
         raise TypeError("images must be a torch.Tensor from ComfyUI")
-
-    tensor = images_tensor.detach().cpu().clamp(0.0, 1.0)
+    tensor = images_tensor.detach()
     if tensor.ndim == 3:
         tensor = tensor.unsqueeze(0)
     if tensor.ndim != 4 or tensor.shape[-1] not in (1, 3, 4):
         raise ValueError(f"Unexpected IMAGE tensor shape: {tuple(tensor.shape)}")
+    return tensor
+
 
-    tensor = (tensor * 255.0).round().to(torch.uint8)
+def _quantize_frame_into(frame, out, scratch) -> None:
+    # clamp -> scale -> round in the float `scratch`, then narrow into `out`
+    if scratch is None:
+        out.copy_(frame)
+        return
+    torch.clamp(frame, 0.0, 1.0, out=scratch)
+    scratch.mul_(255.0).round_()
+    out.copy_(scratch)
+
+
+def tensor_to_uint8(images_tensor):
+    """Quantize an IMAGE tensor to a host uint8 tensor of shape (N, H, W, C).
+
+    Quantization runs on the tensor's own device one frame at a time, so only
+    one frame-sized float temporary exists and only uint8 data is copied to
+    the host (a quarter of the float32 bytes).
+    """
+    ensure_deps()
+    tensor = _as_batch(images_tensor)
+    out = torch.empty(tuple(tensor.shape), dtype=torch.uint8, device=tensor.device)
+    scratch = _frame_scratch(tensor)
     for frame_index in range(tensor.shape[0]):
-        image_tensor_slice = tensor[frame_index]
-        if image_tensor_slice.shape[-1] == 1:
-            np_array = image_tensor_slice[:, :, 0].numpy()
-            pil_image = Image.fromarray(np_array, mode="L")
-        elif image_tensor_slice.shape[-1] == 3:
-            np_array = image_tensor_slice.numpy()
-            pil_image = Image.fromarray(np_array, mode="RGB")
-        else:  # 4
-            np_array = image_tensor_slice.numpy()
-            pil_image = Image.fromarray(np_array, mode="RGBA")
-        pil_images.append(pil_image)
+        _quantize_frame_into(tensor[frame_index], out[frame_index], scratch)
+    return out.cpu()
+
+
+def _frame_to_pil(np_frame) -> Any:
+    # Image.fromarray wraps L and RGBA data without copying; RGB is repacked by PIL
+    if np_frame.shape[-1] == 1:
+        return Image.fromarray(np_frame[:, :, 0])
+    return Image.fromarray(np_frame)
+
+
+def frame_digest(np_frame) -> str:
+    """Content digest of one uint8 frame; the shape is included so reshapes never collide."""
+    if not np_frame.flags.c_contiguous:
+        np_frame = np_frame.copy()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(tuple(np_frame.shape)).encode("ascii"))
+    # Hashes the frame buffer in place (blake2b releases the GIL on large updates)
+    h.update(np_frame.data)
+    return h.hexdigest()
+
+
+def tensor_to_pil_list(images_tensor, digests: Optional[List[str]] = None) -> List[Any]:
+    """Convert a batch to PIL images; appends each frame's frame_digest() to `digests` if given."""
+    ensure_deps()
+    pil_images: List[Any] = []
+    if images_tensor is None:
+        return pil_images
+    frames = tensor_to_uint8(images_tensor).numpy()
+    for frame_index in range(frames.shape[0]):
+        if digests is not None:
+            digests.append(frame_digest(frames[frame_index]))
+        pil_images.append(_frame_to_pil(frames[frame_index]))
     return pil_images
 
+
+def image_size(images_tensor) -> Tuple[int, int]:
+    """(width, height) of an IMAGE tensor without converting it."""
+    tensor = _as_batch(images_tensor)
+    return int(tensor.shape[-2]), int(tensor.shape[-3])
+
+
+def iter_pil_frames(images_tensor, digests: Optional[List[str]] = None) -> Iterator[Any]:
+    """Yield one PIL image per frame, converting each frame only when requested.
+
+    With `digests`, each frame's frame_digest() is appended before it is yielded.
+    """
+    ensure_deps()
+    if images_tensor is None:
+        return
+    tensor = _as_batch(images_tensor)
+    scratch = _frame_scratch(tensor)
+    for frame_index in range(tensor.shape[0]):
+        out = torch.empty(tuple(tensor.shape[1:]), dtype=torch.uint8, device=tensor.device)
+        _quantize_frame_into(tensor[frame_index], out, scratch)
+        np_frame = out.cpu().numpy()
+        if digests is not None:
+            digests.append(frame_digest(np_frame))
+        yield _frame_to_pil(np_frame)
@@ -2,10 +2,10 @@ from __future__ import annotations
 import os
 from typing import Any, Dict, List, Tuple
 
+from ..parsing.graph import parse_prompt_resources
 from ..parsing.workflow import parse_workflow_resources
 from ..hash.compute import (
-    calculate_sha256,
-    short10,
+    model_hashes_many,
     resolve_checkpoint_by_basename,
     resolve_unet_by_basename,
     resolve_clip_by_basename,
@@ -29,59 +29,67 @@ def build_a1111_with_hashes(
     height: int,
     extra_pnginfo: Any,
     overrides: Dict[str, Any] | None = None,
+    prompt_graph: Any = None,
+    node_id: Any = None,
 ) -> Tuple[str, str, List[str], Dict[str, float], List[str], str]:
     """Construct A1111 parameters string with model/LoRA short hashes.
 
+    Resources come from the executed API prompt graph (only loaders upstream
+    of `node_id`) when available, otherwise from the UI workflow.
+
     Returns (a1111_params, model_name, loras, lora_weights, clip_names, vae_name)
     """
-    resources = parse_workflow_resources(extra_pnginfo)
+    resources = parse_prompt_resources(prompt_graph, node_id)
+    if resources is None:
+        resources = parse_workflow_resources(extra_pnginfo)
     model_name = resources.get("model_name") or ""
     loras = resources.get("loras") or []
     lora_weights = resources.get("lora_weights") or {}
     clip_names: List[str] = resources.get("clip_names") or []
     vae_name: str = resources.get("vae_name") or ""
 
-    model_hash_short = ""
+    # Resolve every file first, then hash them concurrently (cold cache reads
+    # of multi-GB models dominate otherwise).
+    ckpt_path = None
     if model_name:
         ckpt_path = resolve_checkpoint_by_basename(model_name)
         if not ckpt_path:
             ckpt_path = resolve_unet_by_basename(model_name)
-        if ckpt_path:
-            try:
-                model_hash_short = short10(calculate_sha256(ckpt_path))
-            except Exception:
-                model_hash_short = ""
-
     lora_paths = resolve_loras_by_basenames(loras)
-    hashes_dict: Dict[str, str] = {}
-    if model_hash_short:
-        hashes_dict["model"] = model_hash_short
-    for ln, lp in lora_paths.items():
-        try:
-            h = short10(calculate_sha256(lp))
-            if h:
-                hashes_dict[f"LORA:{ln}"] = h
-        except Exception:
-            pass
+    clip_paths: Dict[str, str] = {}
     for cn in clip_names:
         cp = resolve_clip_by_basename(cn)
         if cp:
-            try:
-                h = short10(calculate_sha256(cp))
-                if h:
-                    hashes_dict[f"CLIP:{cn}"] = h
-            except Exception:
-                pass
-    if vae_name:
-        vp = resolve_vae_by_basename(vae_name)
-        if vp:
-            try:
-                h = short10(calculate_sha256(vp))
-                if h:
-                    hashes_dict[f"VAE:{vae_name}"] = h
-            except Exception:
-                pass
+            clip_paths[cn] = cp
+    vae_path = resolve_vae_by_basename(vae_name) if vae_name else None
+
+    all_paths: List[str] = []
+    if ckpt_path:
+        all_paths.append(ckpt_path)
+    all_paths.extend(lora_paths.values())
+    all_paths.extend(clip_paths.values())
+    if vae_path:
+        all_paths.append(vae_path)
+    # Short hashes: AutoV2 (SHA-256), or AutoV1 / none yet per EAGLE_HASH_MODE
+    fingerprints: Dict[str, str] = {}
+    digests = model_hashes_many(all_paths, fingerprints=fingerprints)
 
+    model_hash_short = digests.get(ckpt_path, "") if ckpt_path else ""
+    hashes_dict: Dict[str, str] = {}
+    if model_hash_short:
+        hashes_dict["model"] = model_hash_short
+    for ln, lp in lora_paths.items():
+        h = digests.get(lp, "")
+        if h:
+            hashes_dict[f"LORA:{ln}"] = h
+    for cn, cp in clip_paths.items():
+        h = digests.get(cp, "")
+        if h:
+            hashes_dict[f"CLIP:{cn}"] = h
+    if vae_path:
+        h = digests.get(vae_path, "")
+        if h:
+            hashes_dict[f"VAE:{vae_name}"] = h
 
     # Do not modify positive prompt with <lora:...> tokens; keep as-is
     new_positive = (positive or "").strip()
@@ -147,6 +155,7 @@ def build_a1111_with_hashes(
         model_basename=model_name or "",
         model_hash10=model_hash_short,
         hashes=hashes_dict or None,
+        model_fingerprint=fingerprints.get(ckpt_path, "") if ckpt_path else "",
         steps=ov.get("steps"),
         cfg_scale=ov.get("cfg_scale"),
         seed=ov.get("seed"),
@@ -0,0 +1,218 @@
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List
+
+from .config import get_metrics_file, get_metrics_format
+
+# Recent samples kept per timer for quantiles (p50/p95/p99)
+_SAMPLE_WINDOW = 1024
+_QUANTILES = (0.5, 0.95, 0.99)
+_PREFIX = "eagle_send_"
+
+
+class _Timer:
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples: Deque[float] = deque(maxlen=_SAMPLE_WINDOW)
+
+
+def _quantile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    idx = min(len(sorted_samples) - 1, max(0, int(round(q * (len(sorted_samples) - 1)))))
+    return sorted_samples[idx]
+
+
+def _fmt(value: float) -> str:
+    # Exact integers for byte counters (":g" would round 1577305 to 1.5773e+06)
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Process-wide counters and duration timers.
+
+    Counters only go up. Timers keep a count, a running sum and the last
+    _SAMPLE_WINDOW samples for quantiles. snapshot() returns plain numbers so
+    callers can diff two snapshots to attribute work to one send.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._timers: Dict[str, _Timer] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            t = self._timers.get(name)
+            if t is None:
+                t = self._timers[name] = _Timer()
+            t.count += 1
+            t.total += seconds
+            t.samples.append(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Flat {name: value}; timers contribute `<name>_count` and `<name>_seconds`."""
+        with self._lock:
+            out = dict(self._counters)
+            for name, t in self._timers.items():
+                out[name + "_count"] = t.count
+                out[name + "_seconds"] = t.total
+            return out
+
+    def timer_summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            timers = [(name, t.count, t.total, sorted(t.samples)) for name, t in self._timers.items()]
+        out: Dict[str, Dict[str, float]] = {}
+        for name, count, total, samples in timers:
+            entry = {"count": count, "sum": total}
+            for q in _QUANTILES:
+                entry[f"p{int(q * 100)}"] = _quantile(samples, q)
+            out[name] = entry
+        return out
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+        lines: List[str] = []
+        for name, value in counters:
+            metric = _PREFIX + name + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {_fmt(value)}")
+        for name, s in sorted(self.timer_summary().items()):
+            metric = _PREFIX + name + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q in _QUANTILES:
+                lines.append(f'{metric}{{quantile="{q:g}"}} {s[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f"{metric}_sum {s['sum']:.6f}")
+            lines.append(f"{metric}_count {_fmt(s['count'])}")
+        return "\n".join(lines) + "\n"
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _REGISTRY
+
+
+def inc(name: str, value: float = 1) -> None:
+    _REGISTRY.inc(name, value)
+
+
+def observe(name: str, seconds: float) -> None:
+    _REGISTRY.observe(name, seconds)
+
+
+def diff_snapshots(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+    # Only names that changed; *_seconds values are rounded to microseconds
+    out: Dict[str, float] = {}
+    for name, value in after.items():
+        delta = value - before.get(name, 0)
+        if delta:
+            out[name] = round(delta, 6) if name.endswith("_seconds") else delta
+    return out
+
+
+class SendTrace:
+    """Wall-clock time per stage of one send plus the registry counters it moved.
+
+    Counters are the difference of process-wide snapshots, so work done by
+    other threads at the same time (e.g. background hashing) is included.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._before = _REGISTRY.snapshot()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            _REGISTRY.observe("stage_" + name, elapsed)
+
+    def finish(self, success: bool) -> Dict[str, Any]:
+        total = time.perf_counter() - self._started
+        # Stage timers are already reported in stages_ms
+        counters = {
+            k: v for k, v in diff_snapshots(self._before, _REGISTRY.snapshot()).items()
+            if not k.startswith("stage_")
+        }
+        _REGISTRY.observe("send", total)
+        _REGISTRY.inc("sends")
+        if not success:
+            _REGISTRY.inc("send_failures")
+        result = {
+            "total_ms": round(total * 1000.0, 3),
+            "stages_ms": {k: round(v * 1000.0, 3) for k, v in self.stages.items()},
+            "counters": counters,
+        }
+        write_sink(result)
+        return result
+
+
+_SINK_LOCK = threading.Lock()
+
+
+def _write_prometheus(path: str) -> None:
+    # Atomic replace so a textfile collector never reads a partial file
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(_REGISTRY.prometheus_text())
+    os.replace(tmp, path)
+
+
+def write_sink(record: Dict[str, Any]) -> None:
+    path = get_metrics_file()
+    if not path:
+        return
+    try:
+        with _SINK_LOCK:
+            if get_metrics_format() == "prometheus":
+                _write_prometheus(path)
+            else:
+                line = dict(record, ts=time.time())
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    except Exception:
+        pass
+
+
+def register_metrics_route() -> None:
+    # Expose GET /eagle_send/metrics (Prometheus text) when running inside ComfyUI
+    try:
+        # server first: outside ComfyUI it fails before aiohttp is loaded
+        from server import PromptServer  # type: ignore
+        from aiohttp import web  # type: ignore
+
+        routes = PromptServer.instance.routes
+
+        @routes.get("/eagle_send/metrics")
+        async def _eagle_send_metrics(request):  # noqa: ARG001
+            return web.Response(text=_REGISTRY.prometheus_text(), content_type="text/plain")
+    except Exception:
+        pass
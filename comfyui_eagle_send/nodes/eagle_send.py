@@ -1,14 +1,67 @@
 from __future__ import annotations
 import json
-from typing import Any, Dict, List, Tuple
+import os
+import queue
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
-from ..config import get_eagle_host
-from ..image.tensor_convert import tensor_to_pil_list
-from ..image.save import save_images_output
-from ..metadata.generate import build_a1111_with_hashes
-from ..parsing.tags import prompt_to_tags
-from ..parsing.workflow import parse_workflow_resources
-from ..eagle.api import send_to_eagle
+from ..config import get_eagle_host, get_prewarm_enabled, get_send_queue_timeout
+from ..image.formats import DUPLICATE_POLICIES, IMAGE_FORMATS
+from ..metrics import SendTrace, register_metrics_route
+
+# Everything heavier (torch/PIL, folder_paths, the hash cache, sqlite, the HTTP
+# client) is imported inside the methods that use it, so registering the node at
+# ComfyUI startup stays cheap. `python -m benchmarks.import_time` checks this.
+
+
+class _DuplicateFilter:
+    """Applies the `duplicates` policy to frames by content digest.
+
+    skip drops frames already sent to this host (and repeats within the
+    batch); tag_only instead merges the tags into the existing Eagle item.
+    Items are addressed by id once known; a frame whose item can no longer
+    be found in Eagle (or whose name is ambiguous) is sent again.
+    """
+
+    def __init__(self, host: str, policy: str, tags: List[str]):
+        self.host = host
+        self.policy = policy if policy in DUPLICATE_POLICIES else "send"
+        self.tags = tags
+        self.skipped = 0
+        self.tagged = 0
+        self.futures: List[Future] = []
+        self._seen: Set[str] = set()
+
+    def keep(self, digest: str) -> bool:
+        if self.policy == "send":
+            return True
+        if digest in self._seen:
+            self.skipped += 1
+            return False
+        self._seen.add(digest)
+        from ..eagle.api import find_item, get_item, submit_add_tags
+        from ..image.dedupe import get_sent_index
+
+        index = get_sent_index()
+        found = index.lookup(self.host, [digest]).get(digest)
+        if found is None:
+            return True
+        if self.policy == "tag_only":
+            name, item_id = found
+            if item_id:
+                item = get_item(self.host, item_id)
+            else:
+                # First repeat: resolve the (unique) name once and keep the id
+                item = find_item(self.host, name)
+                if item is not None:
+                    index.set_item_id(self.host, digest, item["id"])
+            if item is None:
+                return True
+            self.futures.append(submit_add_tags(self.host, item, self.tags))
+            self.tagged += 1
+        else:
+            self.skipped += 1
+        return False
 
 
 class EagleSend:
@@ -24,9 +77,20 @@ class EagleSend:
             "optional": {
                 "negative": ("STRING", {"default": "", "multiline": True, "forceInput": True}),
                 "d2_pipe": ("D2_TD2Pipe",),
+                "async_send": ("BOOLEAN", {"default": False}),
+                "streaming": ("BOOLEAN", {"default": False}),
+                "save_to_disk": ("BOOLEAN", {"default": True}),
+                "image_format": (list(IMAGE_FORMATS), {"default": "png"}),
+                "quality": ("INT", {"default": 90, "min": 1, "max": 100}),
+                "compress_level": ("INT", {"default": 6, "min": 0, "max": 9}),
+                "optimize": ("BOOLEAN", {"default": False}),
+                "folder": ("STRING", {"default": ""}),
+                "duplicates": (list(DUPLICATE_POLICIES), {"default": "send"}),
             },
             "hidden": {
                 "extra_pnginfo": "EXTRA_PNGINFO",
+                "api_prompt": "PROMPT",
+                "unique_id": "UNIQUE_ID",
             },
         }
 
@@ -35,6 +99,94 @@ class EagleSend:
     FUNCTION = "send"
     CATEGORY = "integration/Eagle"
 
+    @staticmethod
+    def _overrides_from_pipe(d2_pipe) -> Dict[str, Any]:
+        # Extract overrides from d2_pipe if provided
+        ov: Dict[str, Any] = {}
+        try:
+            if d2_pipe is not None:
+                # getattr-safe extraction; tolerate dict-like
+                getter = (lambda k: getattr(d2_pipe, k, None))
+                if isinstance(d2_pipe, dict):
+                    getter = (lambda k: d2_pipe.get(k))
+                steps = getter("steps")
+                cfg = getter("cfg")
+                seed = getter("seed") or getter("noise_seed")
+                sampler_name = getter("sampler_name") or getter("sampler")
+                scheduler = getter("scheduler")
+                clip_skip = getter("clip_skip")
+                if steps is not None:
+                    ov["steps"] = int(steps)
+                if cfg is not None:
+                    ov["cfg_scale"] = float(cfg)
+                if seed is not None:
+                    ov["seed"] = int(seed)
+                if sampler_name:
+                    ov["sampler_name"] = str(sampler_name)
+                if scheduler:
+                    ov["scheduler"] = str(scheduler)
+                if clip_skip is not None:
+                    ov["clip_skip"] = int(clip_skip)
+        except Exception:
+            ov = {}
+        return ov
+
+    @staticmethod
+    def _submit(
+        host: str,
+        paths: List[str],
+        tags: List[str],
+        annotation: str,
+        async_send: bool,
+        inline: bool,
+        blobs: List[Tuple[str, bytes, str]] | None = None,
+        folder_id: str | None = None,
+        dedupe: List[Tuple[str, str]] | None = None,
+    ):
+        """Queue (async_send) or send `paths`/`blobs`; returns (job_id, future) with exactly one set.
+
+        With inline=True the request runs in the calling thread; otherwise it is
+        started in the background (and may be coalesced with other sends).
+        """
+        from ..eagle.api import send_bytes_to_eagle, send_to_eagle, submit_bytes_to_eagle, submit_to_eagle
+
+        if async_send:
+            from ..eagle.send_queue import get_send_queue
+
+            # Hand the finished job to the background queue; fall back to an
+            # inline send only when the queue stays full (backpressure).
+            try:
+                job_id = get_send_queue().submit(
+                    host, paths, tags, annotation=annotation, timeout=get_send_queue_timeout(),
+                    blobs=blobs, folder_id=folder_id, dedupe=dedupe,
+                )
+                return job_id, None
+            except queue.Full:
+                pass
+        if inline:
+            fut: Future = Future()
+            if blobs:
+                fut.set_result(send_bytes_to_eagle(host, blobs, tags, annotation=annotation, folder_id=folder_id))
+            else:
+                fut.set_result(send_to_eagle(host, paths, tags, annotation=annotation, folder_id=folder_id))
+            return None, fut
+        if blobs:
+            return None, submit_bytes_to_eagle(host, blobs, tags, annotation=annotation, folder_id=folder_id)
+        return None, submit_to_eagle(host, paths, tags, annotation=annotation, folder_id=folder_id)
+
+    @staticmethod
+    def _convert_unique(images, dup: _DuplicateFilter) -> Tuple[List[Any], List[str]]:
+        from ..image.tensor_convert import tensor_to_pil_list
+
+        # Digests come from the same uint8 buffer the PIL images wrap
+        digests: List[str] = []
+        pil_images = tensor_to_pil_list(images, digests=digests)
+        kept = [i for i, d in enumerate(digests) if dup.keep(d)]
+        if len(kept) < len(pil_images):
+            pil_images = [pil_images[i] for i in kept]
+            digests = [digests[i] for i in kept]
+        return pil_images, digests
+
     def send(
         self,
         images,
@@ -42,41 +194,42 @@ class EagleSend:
         prompt: str,
         negative: str = "",
         d2_pipe=None,
+        async_send: bool = False,
+        streaming: bool = False,
+        save_to_disk: bool = True,
+        image_format: str = "png",
+        quality: int = 90,
+        compress_level: int = 6,
+        optimize: bool = False,
+        folder: str = "",
+        duplicates: str = "send",
         extra_pnginfo=None,
+        api_prompt=None,
+        unique_id=None,
     ):
-        pil_images = tensor_to_pil_list(images)
-        saved_paths: List[str] = []
-        if pil_images:
-            width, height = pil_images[0].size
-            # Extract overrides from d2_pipe if provided
-            ov = {}
-            try:
-                if d2_pipe is not None:
-                    # getattr-safe extraction; tolerate dict-like
-                    getter = (lambda k: getattr(d2_pipe, k, None))
-                    if isinstance(d2_pipe, dict):
-                        getter = (lambda k: d2_pipe.get(k))
-                    steps = getter("steps")
-                    cfg = getter("cfg")
-                    seed = getter("seed") or getter("noise_seed")
-                    sampler_name = getter("sampler_name") or getter("sampler")
-                    scheduler = getter("scheduler")
-                    clip_skip = getter("clip_skip")
-                    if steps is not None:
-                        ov["steps"] = int(steps)
-                    if cfg is not None:
-                        ov["cfg_scale"] = float(cfg)
-                    if seed is not None:
-                        ov["seed"] = int(seed)
-                    if sampler_name:
-                        ov["sampler_name"] = str(sampler_name)
-                    if scheduler:
-                        ov["scheduler"] = str(scheduler)
-                    if clip_skip is not None:
-                        ov["clip_skip"] = int(clip_skip)
-            except Exception:
-                ov = {}
+        from ..eagle.api import get_breaker, is_retryable
+        from ..eagle.folders import expand_folder_path, resolve_folder
+        from ..eagle.outbox import get_outbox
+        from ..image.dedupe import get_sent_index
+        from ..image.save import (
+            encode_frames_streaming,
+            encode_images,
+            plan_memory_output,
+            plan_output,
+            save_frames_streaming,
+            save_images_output,
+        )
+        from ..image.tensor_convert import image_size, iter_pil_frames
+        from ..metadata.generate import build_a1111_with_hashes, build_eagle_annotation
+        from ..parsing.tags import prompt_to_tags
+
+        trace = SendTrace()
+        # Metadata only needs the frame size, so it is built before any conversion
+        width, height = image_size(images)
+        frame_count = int(images.shape[0]) if images.ndim == 4 else 1
+        ov = self._overrides_from_pipe(d2_pipe)
 
+        with trace.stage("metadata"):
             a1111_params, model_name, loras, lora_weights, clip_names, vae_name = build_a1111_with_hashes(
                 positive=prompt or "",
                 negative=negative or "",
@@ -84,17 +237,13 @@ class EagleSend:
                 height=height,
                 extra_pnginfo=extra_pnginfo,
                 overrides=ov or None,
-            )
-            saved_paths = save_images_output(
-                pil_images,
-                filename_prefix,
-                prompt,
-                extra_pnginfo,
-                a1111_params=a1111_params,
+                prompt_graph=api_prompt,
+                node_id=unique_id,
             )
 
         host = get_eagle_host()
-        tags = prompt_to_tags(prompt)
+        with trace.stage("tags"):
+            tags = prompt_to_tags(prompt)
 
         # add model/lora/clip/vae from workflow (EXTRA_PNGINFO)
         if model_name:
@@ -116,7 +265,6 @@ class EagleSend:
 
         # Build Eagle memo (annotation) for Eagle
         try:
-            from ..metadata.generate import build_eagle_annotation
             annotation_text = build_eagle_annotation(
                 positive=prompt or "",
                 negative=negative or "",
@@ -133,24 +281,239 @@ class EagleSend:
         except Exception:
             annotation_text = a1111_params
 
-        code, resp_text = send_to_eagle(host, saved_paths, tags, annotation=annotation_text)
-        ok = 200 <= int(code or 0) < 300
+        # Resolved once per batch from the cached folder tree (see eagle/folders.py).
+        # Tokens are expanded here so a send replayed from the outbox later still
+        # lands in the folder of this run's date.
+        folder_path = expand_folder_path(folder).strip() if folder else ""
+        folder_id = None
+        if folder_path:
+            with trace.stage("folder"):
+                folder_id, folder_status = resolve_folder(host, folder_path)
+            if not folder_id and folder_status != 0:
+                # Eagle is up but refused the folder: import without it. Only an
+                # unreachable Eagle defers the send to the outbox (see _dispatch).
+                folder_path = ""
+
+        job_ids: List[str] = []
+        # One future per direct request, resolved to (code, body, outbox entry id)
+        # by _settle once the request finished
+        settled: List[Future] = []
+        dup = _DuplicateFilter(host, duplicates, tags)
+        sent_index = get_sent_index()
+        outbox = get_outbox()
+        outbox_ids: List[str] = []
+
+        def _settle(fut: Future, entries: List[Tuple[str, str]], held: List[Any]) -> Tuple[Any, str, str | None]:
+            # Done-callback of a direct request: record the frames on success, or
+            # journal them to the outbox when Eagle could not be reached. `held`
+            # (paths, blobs) is cleared so encoded frames are released right away.
+            paths, blobs = held
+            held.clear()
+            try:
+                c, t = fut.result()
+            except Exception as e:
+                c, t = 0, str(e)
+            if 200 <= int(c or 0) < 300:
+                sent_index.record(host, entries)
+            elif outbox is not None and is_retryable(int(c or 0)):
+                entry_id = outbox.add(
+                    host, paths, tags, annotation_text, folder_id=folder_id, blobs=blobs, folder=folder_path,
+                    dedupe=entries,
+                )
+                if entry_id:
+                    return c, t, entry_id
+            return c, t, None
+
+        def _dispatch(
+            paths: List[str], blobs: List[Tuple[str, bytes, str]] | None = None, digests: List[str] | None = None
+        ) -> None:
+            names = [b[0] for b in blobs] if blobs else [os.path.splitext(os.path.basename(p))[0] for p in paths]
+            entries = list(zip(digests or [], names))
+            if outbox is not None and (outbox.has_pending(host) or (folder_path and not folder_id)):
+                # Earlier sends are still waiting for Eagle, or the folder could not be
+                # resolved: queue behind them (keeping order) with the folder path
+                entry_id = outbox.add(
+                    host, paths, tags, annotation_text, folder_id=folder_id, blobs=blobs, folder=folder_path,
+                    dedupe=entries,
+                )
+                if entry_id:
+                    # Recorded as sent by the outbox once it is delivered
+                    outbox_ids.append(entry_id)
+                    if get_breaker().state(host) == "closed":
+                        # Eagle is not known to be down: replay now rather than
+                        # holding this send back for the whole retry interval
+                        outbox.wake()
+                    return
+            job_id, fut = self._submit(
+                host, paths, tags, annotation_text, async_send, inline=not streaming, blobs=blobs,
+                folder_id=folder_id, dedupe=entries,
+            )
+            if job_id is not None:
+                # The queue records the frames as sent when the job succeeds
+                job_ids.append(job_id)
+            else:
+                done: Future = Future()
+                held: List[Any] = [paths, blobs]
+
+                def _on_done(f: Future) -> None:
+                    try:
+                        done.set_result(_settle(f, entries, held))
+                    except Exception as e:
+                        done.set_result((0, str(e), None))
+
+                fut.add_done_callback(_on_done)
+                settled.append(done)
+
+        def _unique_frames(kept_digests: List[str]) -> Iterator[Any]:
+            # Streaming counterpart of the batch filter below
+            digests: List[str] = []
+            for pil_image in iter_pil_frames(images, digests=digests):
+                if dup.keep(digests[-1]):
+                    kept_digests.append(digests[-1])
+                    yield pil_image
+
+        saved_paths: List[str] = []
+        sent_in_memory = 0
+        if not save_to_disk:
+            # Encode in memory and import through addFromURLs (base64 data URLs)
+            names, save_kwargs, mime = plan_memory_output(
+                filename_prefix, frame_count, prompt, extra_pnginfo,
+                a1111_params=a1111_params, compress_level=compress_level, optimize=optimize,
+                image_format=image_format, quality=quality,
+            )
+            if streaming:
+                name_iter = iter(names)
+                kept_digests: List[str] = []
+                digest_iter = iter(kept_digests)
+                # convert, encode and submit overlap, so they are timed as one stage
+                with trace.stage("stream"):
+                    sent_in_memory = encode_frames_streaming(
+                        _unique_frames(kept_digests), save_kwargs,
+                        on_encoded=lambda data: _dispatch(
+                            [], [(next(name_iter), data, mime)], [next(digest_iter)]
+                        ),
+                    )
+            else:
+                with trace.stage("convert"):
+                    pil_images, digests = self._convert_unique(images, dup)
+                with trace.stage("encode"):
+                    encoded = encode_images(pil_images, save_kwargs)
+                del pil_images
+                sent_in_memory = len(encoded)
+                if encoded:
+                    _dispatch([], [(n, data, mime) for n, data in zip(names, encoded)], digests)
+                del encoded
+        elif streaming:
+            # convert -> encode/write -> submit per frame; each saved frame is
+            # submitted while later frames are still being converted and encoded
+            save_paths, save_kwargs = plan_output(
+                filename_prefix, width, height, frame_count, prompt, extra_pnginfo,
+                a1111_params=a1111_params, compress_level=compress_level, optimize=optimize,
+                image_format=image_format, quality=quality,
+            )
+            kept_digests = []
+            digest_iter = iter(kept_digests)
+            with trace.stage("stream"):
+                saved_paths = save_frames_streaming(
+                    _unique_frames(kept_digests), save_paths, save_kwargs,
+                    on_saved=lambda p: _dispatch([p], digests=[next(digest_iter)]),
+                )
+        else:
+            with trace.stage("convert"):
+                pil_images, digests = self._convert_unique(images, dup)
+            with trace.stage("save"):
+                saved_paths = save_images_output(
+                    pil_images,
+                    filename_prefix,
+                    prompt,
+                    extra_pnginfo,
+                    a1111_params=a1111_params,
+                    compress_level=compress_level,
+                    optimize=optimize,
+                    image_format=image_format,
+                    quality=quality,
+                )
+            del pil_images
+            if saved_paths:
+                _dispatch(saved_paths, digests=digests)
+
+        with trace.stage("send"):
+            results = [done.result() for done in settled]
+            responses = [(c, t) for c, t, entry_id in results if not entry_id]
+            responses.extend(fut.result() for fut in dup.futures)
+        # Journaled sends are delivered later by the outbox, so not reported as failures
+        outbox_ids.extend(entry_id for _, _, entry_id in results if entry_id)
+        code, resp_text = None, ""
+        ok = True
+        for c, t in responses:
+            # Report the first failure, otherwise the last response
+            if ok:
+                code, resp_text = c, t
+                ok = 200 <= int(c or 0) < 300
+        # Journaled images have not reached Eagle yet, so the run is not reported as
+        # a success; it is not a failed request either (metrics count only those)
+        pending = bool(outbox_ids)
         resp = {
             "http": code,
+            "queued": bool(job_ids),
+            "job_id": job_ids[0] if job_ids else None,
+            "job_ids": job_ids,
+            "outbox_ids": outbox_ids,
             "paths": len(saved_paths),
+            "in_memory": sent_in_memory,
             "tags_count": len(tags),
             "tags": tags,
             "model_name": model_name,
             "loras": loras,
             "host": host,
+            "folder_id": folder_id,
+            "duplicates": dup.skipped,
+            "tagged": dup.tagged,
             "parameters": a1111_params,
             "annotation": annotation_text,
-            "success": ok,
+            "success": ok and not pending,
+            "pending": pending,
             "body": resp_text,
+            "metrics": trace.finish(ok),
         }
         return (images, json.dumps(resp, ensure_ascii=False))
 
 
+# Optional background hash pre-warming (EAGLE_HASH_PREWARM=1); the indexer and
+# the hash cache behind it are only imported when it is enabled
+if get_prewarm_enabled():
+    from ..hash.indexer import start_indexer_if_enabled
+
+    start_indexer_if_enabled()
+
+
+def _register_job_route() -> None:
+    # Expose GET /eagle_send/job/{job_id} (status of an async_send job) inside
+    # ComfyUI; the queue module is only imported when a job is looked up
+    try:
+        # server first: outside ComfyUI it fails before aiohttp is loaded
+        from server import PromptServer  # type: ignore
+        from aiohttp import web  # type: ignore
+
+        routes = PromptServer.instance.routes
+
+        @routes.get("/eagle_send/job/{job_id}")
+        async def _eagle_send_job(request):
+            from ..eagle.send_queue import get_job_status
+
+            job_id = request.match_info.get("job_id", "")
+            status = get_job_status(job_id)
+            if status is None:
+                return web.json_response({"job_id": job_id, "error": "unknown job"}, status=404)
+            return web.json_response(dict(status, job_id=job_id))
+    except Exception:
+        pass
+
+
+register_metrics_route()
+_register_job_route()
+
+
 NODE_CLASS_MAPPINGS = {
     "EagleSend": EagleSend,
 }
@@ -0,0 +1,81 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .workflow import parse_nodes
+
+
+def _is_link(value: Any) -> bool:
+    # API-format inputs reference other nodes as [source_node_id, output_index]
+    return (
+        isinstance(value, list)
+        and len(value) == 2
+        and isinstance(value[0], (str, int))
+        and isinstance(value[1], int)
+    )
+
+
+def build_upstream_index(prompt_graph: Dict[str, Any]) -> Dict[str, List[str]]:
+    """node id -> ids of the nodes feeding its inputs."""
+    index: Dict[str, List[str]] = {}
+    for node_id, node in prompt_graph.items():
+        sources: List[str] = []
+        inputs = node.get("inputs") if isinstance(node, dict) else None
+        if isinstance(inputs, dict):
+            for value in inputs.values():
+                if _is_link(value):
+                    src = str(value[0])
+                    if src not in sources:
+                        sources.append(src)
+        index[str(node_id)] = sources
+    return index
+
+
+def _upstream_distances(index: Dict[str, List[str]], start: str) -> Dict[str, int]:
+    dist: Dict[str, int] = {start: 0}
+    todo = deque([start])
+    while todo:
+        cur = todo.popleft()
+        for src in index.get(cur, ()):
+            if src not in dist:
+                dist[src] = dist[cur] + 1
+                todo.append(src)
+    return dist
+
+
+def _id_sort_key(node_id: str) -> Tuple[int, Any]:
+    try:
+        return 0, int(node_id)
+    except Exception:
+        return 1, node_id
+
+
+def parse_prompt_resources(prompt_graph: Any, output_node_id: Any) -> Optional[Dict[str, Any]]:
+    """Resources of the loaders that actually feed `output_node_id` in an API-format prompt.
+
+    Walks upstream from the output node, so loaders that are present but not
+    connected to this image are ignored. Nodes are visited from the farthest
+    upstream towards the output, which lists LoRAs in the order they are
+    applied and reports the base checkpoint as the model.
+
+    Returns None when the graph or the output node is unavailable, so callers
+    can fall back to parse_workflow_resources.
+    """
+    if not isinstance(prompt_graph, dict) or output_node_id is None:
+        return None
+    start = str(output_node_id)
+    if start not in prompt_graph:
+        return None
+    index = build_upstream_index(prompt_graph)
+    dist = _upstream_distances(index, start)
+    ordered = sorted(
+        (nid for nid in dist if nid != start),
+        key=lambda nid: (-dist[nid], _id_sort_key(nid)),
+    )
+    nodes: List[Dict[str, Any]] = []
+    for nid in ordered:
+        node = prompt_graph.get(nid)
+        if not isinstance(node, dict):
+            continue
+        nodes.append({"type": node.get("class_type"), "inputs": node.get("inputs") or {}})
+    return parse_nodes(nodes)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import csv
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Compiled index layout (all integers little-endian):
+#   magic (8 bytes) | source size (u64) | source mtime_ns (u64) | count (u32)
+#   count x u32 record offsets, sorted by key bytes
+#   records: key bytes b"\0" value bytes b"\n"
+# Values with several entries (implications) are joined with b"\x1f".
+_MAGIC = b"EGTAGIX1"
+_HEADER = struct.Struct("<8sQQI")
+_OFFSET = struct.Struct("<I")
+_MULTI_SEP = "\x1f"
+
+
+def tag_key(tag: str) -> str:
+    """Lookup form of a tag: lowercase, underscores instead of spaces."""
+    return "_".join((tag or "").strip().lower().split())
+
+
+def _read_pairs(csv_path: str, multi: bool) -> Dict[str, str]:
+    """Read alias -> canonical (or tag -> implied tags) pairs from a CSV file.
+
+    Accepted layouts:
+      - two columns: antecedent,consequent (Danbooru tag_aliases / tag_implications export)
+      - tag-autocomplete style: name,category,post_count,"alias1,alias2,..."
+    A header row is skipped when present.
+    """
+    pairs: Dict[str, str] = {}
+    with open(csv_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            if len(row) >= 4:
+                canonical = tag_key(row[0])
+                if not canonical:
+                    continue
+                for alias in row[3].split(","):
+                    key = tag_key(alias)
+                    if key and key != canonical:
+                        pairs.setdefault(key, canonical)
+                continue
+            key, value = tag_key(row[0]), tag_key(row[1])
+            if not key or not value or key == value or key in ("antecedent_name", "antecedent"):
+                continue
+            if multi:
+                prev = pairs.get(key)
+                if prev is None:
+                    pairs[key] = value
+                elif value not in prev.split(_MULTI_SEP):
+                    pairs[key] = prev + _MULTI_SEP + value
+            else:
+                pairs.setdefault(key, value)
+    return pairs
+
+
+def compile_index(csv_path: str, index_path: str, multi: bool = False) -> None:
+    st = os.stat(csv_path)
+    pairs = _read_pairs(csv_path, multi)
+    keys = sorted(pairs, key=lambda k: k.encode("utf-8"))
+    records: List[bytes] = [k.encode("utf-8") + b"\0" + pairs[k].encode("utf-8") + b"\n" for k in keys]
+    base = _HEADER.size + _OFFSET.size * len(records)
+    offsets = bytearray()
+    pos = base
+    for rec in records:
+        offsets += _OFFSET.pack(pos)
+        pos += len(rec)
+    tmp = index_path + f".tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, int(st.st_size), int(st.st_mtime_ns), len(records)))
+        f.write(offsets)
+        for rec in records:
+            f.write(rec)
+    os.replace(tmp, index_path)
+
+
+class TagIndex:
+    """Read-only, memory-mapped key -> value lookup over a compiled index file.
+
+    Lookups binary-search the sorted offsets table directly in the mapping,
+    so a 100k-row dictionary costs no Python objects until queried.
+    """
+
+    def __init__(self, index_path: str):
+        self._file = open(index_path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.source_size, self.source_mtime_ns, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Not a tag index: {index_path}")
+
+    def _record(self, i: int) -> Tuple[bytes, int]:
+        (off,) = _OFFSET.unpack_from(self._mm, _HEADER.size + _OFFSET.size * i)
+        end = self._mm.find(b"\0", off)
+        return self._mm[off:end], end + 1
+
+    def get(self, key: str) -> Optional[str]:
+        target = key.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k, value_start = self._record(mid)
+            if k < target:
+                lo = mid + 1
+            elif k > target:
+                hi = mid
+            else:
+                value_end = self._mm.find(b"\n", value_start)
+                return self._mm[value_start:value_end].decode("utf-8", errors="replace")
+        return None
+
+    def get_all(self, key: str) -> List[str]:
+        value = self.get(key)
+        return value.split(_MULTI_SEP) if value else []
+
+
+def _index_path_for(csv_path: str, cache_dir: str) -> str:
+    # Next to the CSV when writable, otherwise in the package cache folder
+    candidate = csv_path + ".eagleidx"
+    parent = os.path.dirname(os.path.abspath(csv_path))
+    if os.access(parent, os.W_OK):
+        return candidate
+    name = os.path.basename(csv_path) + ".eagleidx"
+    return os.path.join(cache_dir, name)
+
+
+def _is_current(index_path: str, csv_path: str) -> bool:
+    try:
+        st = os.stat(csv_path)
+        with open(index_path, "rb") as f:
+            magic, size, mtime_ns, _ = _HEADER.unpack(f.read(_HEADER.size))
+        return magic == _MAGIC and size == st.st_size and mtime_ns == st.st_mtime_ns
+    except Exception:
+        return False
+
+
+class LazyTagIndex:
+    """Opens (compiling first if needed) a tag index in the background on first use.
+
+    Until the index is ready, lookups return nothing, so neither startup nor
+    the first send waits for a large CSV to be compiled.
+    """
+
+    def __init__(self, csv_path: str, cache_dir: str, multi: bool = False):
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir
+        self.multi = multi
+        self._index: Optional[TagIndex] = None
+        self._started = False
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def _load(self) -> None:
+        try:
+            index_path = _index_path_for(self.csv_path, self.cache_dir)
+            if not _is_current(index_path, self.csv_path):
+                compile_index(self.csv_path, index_path, multi=self.multi)
+            self._index = TagIndex(index_path)
+            self.generation += 1
+        except Exception:
+            self._index = None
+
+    def get_index(self) -> Optional[TagIndex]:
+        if self._index is None and not self._started:
+            with self._lock:
+                if not self._started:
+                    self._started = True
+                    threading.Thread(target=self._load, name="EagleTagIndex", daemon=True).start()
+        return self._index
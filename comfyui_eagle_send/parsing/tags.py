@@ -1,15 +1,29 @@
 from __future__ import annotations
+import os
 import re
-from typing import List
+import threading
+from typing import List, Optional
+
+from ..config import get_tag_aliases_path, get_tag_implications_path, get_tag_cache_size
+from ..lru import LRUCache
+from .tag_index import LazyTagIndex, tag_key
+
+# Delimiters between tags: line breaks, commas, semicolons, pipes, slashes,
+# their full-width forms and the A1111 "BREAK" keyword.
+_SPLIT_RE = re.compile(r"\r\n|\r|\n|,|;|\||/|\uFF0C|\u3001|\uFF1B|\uFF5C|\uFF0F|(?i:BREAK)")
+_WEIGHT_RE = re.compile(r"^([^:(){}\[\]]+):\d+(?:\.\d+)?$")
+_WS_RE = re.compile(r"\s+")
+_NEWLINES_RE = re.compile(r"\n+")
+
+# Depth limit when following implication chains (a -> b -> c ...)
+_MAX_IMPLICATION_DEPTH = 4
 
 
 def normalize_prompt(text: str) -> str:
     if not isinstance(text, str):
         return ""
-    t = text.replace("\r\n", "\n").replace("\r", "\n")
-    pattern = r"(?:\r?\n|,|;|\||/|\uFF0C|\u3001|\uFF1B|\uFF5C|\uFF0F|(?i:BREAK))"
-    t = re.sub(pattern, "\n", t)
-    t = re.sub(r"\n+", "\n", t)
+    t = _SPLIT_RE.sub("\n", text)
+    t = _NEWLINES_RE.sub("\n", t)
     return t.strip("\n")
 
 
@@ -21,23 +35,106 @@ def _clean_tag(token: str) -> str:
         token_str = token_str[1:].strip()
     if token_str and token_str[-1] in ")]}":
         token_str = token_str[:-1].strip()
-    match = re.match(r"^([^:(){}\[\]]+):\d+(?:\.\d+)?$", token_str)
+    match = _WEIGHT_RE.match(token_str)
     if match:
         token_str = match.group(1).strip()
-    token_str = re.sub(r"\s+", " ", token_str)
+    token_str = _WS_RE.sub(" ", token_str)
     return token_str
 
 
-def prompt_to_tags(text: str, max_tags: int = 128) -> List[str]:
-    normalized = normalize_prompt(text)
+def _package_dir() -> str:
+    return os.path.dirname(os.path.dirname(__file__))
+
+
+_ALIASES: Optional[LazyTagIndex] = None
+_IMPLICATIONS: Optional[LazyTagIndex] = None
+_DICT_LOCK = threading.Lock()
+_DICT_CONFIGURED = False
+
+
+def _configure_dictionaries() -> None:
+    global _ALIASES, _IMPLICATIONS, _DICT_CONFIGURED
+    if not _DICT_CONFIGURED:
+        with _DICT_LOCK:
+            if not _DICT_CONFIGURED:
+                alias_path = get_tag_aliases_path()
+                impl_path = get_tag_implications_path()
+                if alias_path and os.path.isfile(alias_path):
+                    _ALIASES = LazyTagIndex(alias_path, _package_dir())
+                if impl_path and os.path.isfile(impl_path):
+                    _IMPLICATIONS = LazyTagIndex(impl_path, _package_dir(), multi=True)
+                _DICT_CONFIGURED = True
+
+
+def _display(key: str, original: str) -> str:
+    # Keep the prompt's style: underscores only if the user wrote them
+    return key if "_" in original else key.replace("_", " ")
+
+
+def _canonical_tags(tag: str, aliases, implications) -> List[str]:
+    """The canonical form of `tag` followed by the tags it implies."""
+    key = tag_key(tag)
+    canonical = aliases.get(key) if aliases is not None else None
+    out = [_display(canonical, tag) if canonical else tag]
+    if implications is not None:
+        frontier = [canonical or key]
+        seen = set(frontier)
+        for _ in range(_MAX_IMPLICATION_DEPTH):
+            nxt: List[str] = []
+            for k in frontier:
+                for implied in implications.get_all(k):
+                    if implied not in seen:
+                        seen.add(implied)
+                        nxt.append(implied)
+                        out.append(_display(implied, tag))
+            if not nxt:
+                break
+            frontier = nxt
+    return out
+
+
+_TAGS_CACHE = LRUCache(get_tag_cache_size())
+
+
+def _tags_uncached(text: str, max_tags: int, aliases, implications) -> List[str]:
     tags: List[str] = []
     seen: set[str] = set()
-    for raw in normalized.split("\n"):
+    if not isinstance(text, str):
+        return tags
+    for raw in _SPLIT_RE.split(text):
         cleaned = _clean_tag(raw)
-        if cleaned and cleaned not in seen:
-            tags.append(cleaned)
-            seen.add(cleaned)
-        if len(tags) >= max_tags:
-            break
+        if not cleaned:
+            continue
+        candidates = (
+            _canonical_tags(cleaned, aliases, implications)
+            if aliases is not None or implications is not None
+            else (cleaned,)
+        )
+        for tag in candidates:
+            if tag and tag not in seen:
+                tags.append(tag)
+                seen.add(tag)
+            if len(tags) >= max_tags:
+                return tags
     return tags
 
+
+def prompt_to_tags(text: str, max_tags: int = 128) -> List[str]:
+    _configure_dictionaries()
+    # Read generations before the indexes: a result computed while an index
+    # was still loading must not be cached under the loaded generation.
+    generation = (
+        _ALIASES.generation if _ALIASES is not None else 0,
+        _IMPLICATIONS.generation if _IMPLICATIONS is not None else 0,
+    )
+    aliases = _ALIASES.get_index() if _ALIASES is not None else None
+    implications = _IMPLICATIONS.get_index() if _IMPLICATIONS is not None else None
+    key = (text, max_tags, generation) if isinstance(text, str) else None
+    if key is not None:
+        cached = _TAGS_CACHE.get(key)
+        if cached is not None:
+            return list(cached)
+    tags = _tags_uncached(text, max_tags, aliases, implications)
+    if key is not None:
+        _TAGS_CACHE.put(key, tuple(tags))
+    return tags
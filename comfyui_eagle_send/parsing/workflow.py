@@ -1,7 +1,11 @@
 from __future__ import annotations
+import hashlib
 import json
 from typing import Any, Dict, List
 
+from ..config import get_workflow_cache_size
+from ..lru import LRUCache
+
 
 MODEL_NODE_TYPES = {"CheckpointLoaderSimple", "CheckpointLoader"}
 UNET_NODE_TYPES = {"UNETLoader"}
@@ -46,17 +50,65 @@ def _normalize_name_drop_ext(name: str) -> str:
     return base.strip()
 
 
+def _empty_result() -> Dict[str, Any]:
+    return {"model_name": "", "loras": [], "lora_weights": {}, "clip_names": [], "vae_name": ""}
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    # Cached results are shared; hand out copies of the mutable members
+    out = dict(result)
+    out["loras"] = list(result["loras"])
+    out["lora_weights"] = dict(result["lora_weights"])
+    out["clip_names"] = list(result["clip_names"])
+    return out
+
+
+def workflow_digest(payload: str) -> str:
+    """Cheap content digest of a serialized workflow (BLAKE2b, 128 bit)."""
+    return hashlib.blake2b(payload.encode("utf-8", errors="surrogatepass"), digest_size=16).hexdigest()
+
+
+# Parsed resources of serialized workflows, keyed by workflow_digest(). Queued
+# runs usually share one workflow, so json.loads + the node walk run once.
+# Already-parsed (dict) workflows are not cached: serializing them for a digest
+# costs far more than walking their nodes.
+_RESULT_CACHE = LRUCache(get_workflow_cache_size())
+
+
+def get_workflow_cache_stats() -> Dict[str, int]:
+    return _RESULT_CACHE.stats()
+
+
 def parse_workflow_resources(extra_pnginfo: Any) -> Dict[str, Any]:
-    result: Dict[str, Any] = {"model_name": "", "loras": [], "lora_weights": {}, "clip_names": [], "vae_name": ""}
     if not isinstance(extra_pnginfo, dict):
-        return result
+        return _empty_result()
     wf = extra_pnginfo.get("workflow")
-    if isinstance(wf, str):
-        try:
-            wf = json.loads(wf)
-        except Exception:
-            wf = None
-    nodes = _as_nodes_list(wf)
+    if not isinstance(wf, str):
+        return _parse_workflow_obj(wf)
+    key = workflow_digest(wf)
+    cached = _RESULT_CACHE.get(key)
+    if cached is not None:
+        return _copy_result(cached)
+    try:
+        wf_obj = json.loads(wf)
+    except Exception:
+        wf_obj = None
+    result = _parse_workflow_obj(wf_obj)
+    _RESULT_CACHE.put(key, _copy_result(result))
+    return result
+
+
+def _parse_workflow_obj(wf: Any) -> Dict[str, Any]:
+    return parse_nodes(_as_nodes_list(wf))
+
+
+def parse_nodes(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Extract model/LoRA/CLIP/VAE names from node dicts, in the given order.
+
+    Nodes use the UI workflow layout ("type", "inputs", "widgets_values");
+    API-format nodes work too when passed as {"type": class_type, "inputs": inputs}.
+    """
+    result = _empty_result()
     if not nodes:
         return result
 